@@ -1,13 +1,38 @@
 """
 Password hashing and verification utilities.
+
+bcrypt is deliberately slow, so the async helpers run it in a bounded
+process pool instead of blocking the event loop.
 """
 
+import time
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from prometheus_client import Gauge, Histogram
+from app.core.config import settings
 
 # ✅ use bcrypt_sha256 (safe against length and encoding issues)
 _pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
 
+# === Prometheus Metrics ===
+hash_queue_depth = Gauge(
+    "password_hash_queue_depth", "Password hash operations waiting for a slot"
+)
+hash_in_flight = Gauge(
+    "password_hash_in_flight", "Password hash operations currently running"
+)
+hash_latency = Histogram(
+    "password_hash_seconds",
+    "Password hash/verify latency including queueing",
+    ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+_executor: Executor | None = None
+_semaphore: asyncio.Semaphore | None = None
+
 
 def validate_password_strength(password: str):
     """
@@ -38,3 +63,67 @@ def verify_password(plain: str, hashed: str) -> bool:
     Verify a plaintext password against a stored hash.
     """
     return _pwd_context.verify(plain, hashed)
+
+
+def _hash(password: str) -> str:
+    return _pwd_context.hash(password)
+
+
+def _get_executor() -> Executor | None:
+    """
+    Lazily create the hashing pool. PASSWORD_HASH_WORKERS=0 falls back to the
+    loop's default thread pool (bcrypt releases the GIL).
+    """
+    global _executor
+    if _executor is None and settings.PASSWORD_HASH_WORKERS != 0:
+        _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def _run(op: str, func, *args):
+    start = time.perf_counter()
+    hash_queue_depth.inc()
+    queued = True
+    try:
+        async with _get_semaphore():
+            hash_queue_depth.dec()
+            queued = False
+            with hash_in_flight.track_inprogress():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        if queued:
+            hash_queue_depth.dec()
+        hash_latency.labels(op=op).observe(time.perf_counter() - start)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Validate and hash a password without blocking the event loop.
+    """
+    validate_password_strength(password)
+    return await _run("hash", _hash, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """
+    Verify a password against its hash without blocking the event loop.
+    """
+    return await _run("verify", verify_password, plain, hashed)
+
+
+def shutdown_hash_pool() -> None:
+    """
+    Stop the hashing worker processes (called on application shutdown).
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
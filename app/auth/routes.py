@@ -3,8 +3,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.auth.service import AuthService
+from app.auth.dependencies import get_current_user
+from app.users.schemas import UserRead
+from app.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=TimedRoute)
 
 
 @router.post("/register", summary="Register a new user")
@@ -50,3 +53,11 @@ async def login_user(
 
     token = service.create_access_token({"sub": user.name})
     return {"access_token": token, "token_type": "bearer"}
+
+
+@router.get("/me", response_model=UserRead, summary="Get the authenticated user")
+async def read_current_user(user: UserRead = Depends(get_current_user)):
+    """
+    Return the user identified by the bearer token.
+    """
+    return user
@@ -3,8 +3,11 @@ from jose import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models import User
-from app.auth.password_utils import hash_password, verify_password
+from app.auth.password_utils import hash_password_async, verify_password_async
 from app.core.config import settings
+from app.repositories.user_repository import ENTITY_CACHE_NAMESPACE, UserRepository
+from app.utils import redis_manager
+from app.utils.read_through_cache import ReadThroughCache
 
 
 class AuthService:
@@ -14,24 +17,24 @@ class AuthService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        cache = None
+        if redis_manager.redis_client:
+            cache = ReadThroughCache(redis_manager.redis_client, ENTITY_CACHE_NAMESPACE)
+        self.repo = UserRepository(db, cache=cache)
 
     async def register_user(self, name: str, password: str) -> dict:
-        existing = await self.db.execute(select(User).where(User.name == name))
-        if existing.scalar_one_or_none():
+        hashed = await hash_password_async(password)
+        # Single INSERT ... ON CONFLICT: the database detects taken names
+        user = await self.repo.create_user(name=name, hashed_password=hashed)
+        if user is None:
             raise ValueError("Username already taken")
-
-        hashed = hash_password(password)
-        user = User(name=name, hashed_password=hashed)
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
         return {"id": user.id, "name": user.name}
 
     async def authenticate(self, username: str, password: str):
         result = await self.db.execute(select(User).where(User.name == username))
         user = result.scalar_one_or_none()
 
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             return None
         return user
 
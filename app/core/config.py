@@ -4,6 +4,7 @@ Application configuration module.
 Defines and validates all runtime environment variables using Pydantic.
 """
 
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,19 +12,102 @@ class Settings(BaseSettings):
     # === Security & Auth ===
     SECRET_KEY: str = "dev_secret_key"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_WORKERS: Optional[int] = None  # None = CPU count, 0 = threads
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 8
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # verified tokens kept until their exp
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL: float = 30.0  # seconds
 
     # === Database ===
     DATABASE_URL: str = "postgresql+asyncpg://myuser:mypassword@db:5432/mydb"
+    DB_ECHO: bool = False  # log every SQL statement (slow; debugging only)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements; 0 for pgbouncer
+
+    # === Read replicas ===
+    DATABASE_REPLICA_URLS: List[str] = []  # JSON list; empty = primary only
+    DB_REPLICA_BALANCING: str = "round_robin"  # or "least_connections"
+    DB_REPLICA_HEALTH_INTERVAL: float = 5.0  # seconds between health checks
+    DB_REPLICA_HEALTH_TIMEOUT: float = 2.0  # seconds
+    DB_READ_YOUR_WRITES_WINDOW: float = 5.0  # seconds a writer reads from primary
 
     # === Redis ===
     REDIS_URL: str = "redis://redis:6379"
 
+    # === Rate limiting ===
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MODE: str = "redis"  # "redis" (exact) or "local" (batched sync)
+    RATE_LIMIT_ALGORITHM: str = "sliding_window"  # or "token_bucket"
+    RATE_LIMIT_SYNC_INTERVAL: float = 0.25  # seconds between local-mode syncs
+    RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_MAX_REQUESTS: int = 100  # per client IP per window
+    RATE_LIMIT_USER_MAX_REQUESTS: int = 300  # per authenticated user per window
+    RATE_LIMIT_ROUTES: Dict[str, int] = {}  # path prefix -> limit, e.g. {"/auth": 10}
+
+    # === Users ===
+    USERS_PAGE_DEFAULT_LIMIT: int = 50
+    USERS_PAGE_MAX_LIMIT: int = 500
+    USERS_CACHE_TTL: int = 60  # seconds
+    USERS_L1_MAXSIZE: int = 1024  # pages held in-process per worker
+    USERS_L1_TTL: float = 5.0  # seconds
+    USERS_BULK_BATCH_SIZE: int = 1000  # rows per multi-row INSERT
+    USERS_EXPORT_CHUNK_SIZE: int = 1000  # rows fetched per cursor round trip
+    USERS_EXPORT_SEGMENT_SIZE: int = 20000  # rows read per DB connection checkout
+
+    # === Entity read-through cache ===
+    ENTITY_CACHE_TTL: int = 300  # seconds
+    ENTITY_CACHE_NEGATIVE_TTL: int = 10  # seconds a "not found" is remembered
+    ENTITY_CACHE_LOCK_TIMEOUT: float = 2.0  # seconds
+    ENTITY_CACHE_BETA: float = 1.0  # >1 refreshes earlier, <1 later
+
+    # === Jobs ===
+    JOBS_STATUS_MAX_BATCH: int = 1000  # job ids per POST /jobs/status
+    JOBS_ENQUEUE_MAX_BATCH: int = 1000  # filenames per POST /jobs/upload/batch
+    JOBS_STREAM_MAX_JOBS: int = 100  # job ids per status stream
+    JOBS_STREAM_POLL_INTERVAL: float = 5.0  # fallback re-read of watched jobs
+    JOBS_STREAM_KEEPALIVE: float = 15.0  # seconds between SSE keepalive comments
+    QUEUE_METRICS_TTL: float = 5.0  # seconds queue stats are reused across scrapes
+
+    # === Worker (python -m app.queue.concurrent_worker) ===
+    WORKER_CONCURRENCY: int = 8  # jobs running at once per worker process
+    WORKER_PREFETCH: int = 2  # extra jobs dequeued ahead of a free slot
+    WORKER_PROCESSES: Optional[int] = None  # @cpu_bound pool (None = CPUs, 0 = threads)
+    WORKER_WITH_SCHEDULER: bool = True  # needed for Retry intervals
+    WORKER_METRICS_PORT: int = 9100  # 0 disables the /metrics listener
+
+    # === Registry cleaner (python -m app.cron_cleaner) ===
+    CLEANER_INTERVAL: int = 300  # seconds between passes
+    CLEANER_CHUNK_SIZE: int = 1000  # registry entries removed per Redis call
+    CLEANER_MAX_FINISHED: int = 100000  # per queue, 0 = no cap
+    CLEANER_MAX_FAILED: int = 10000  # per queue, 0 = no cap
+    CLEANER_STARTED_GRACE: int = 3600  # seconds past a missed heartbeat
+    CLEANER_METRICS_PORT: int = 9101  # 0 disables the /metrics listener
+
+    # === Logging ===
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000  # records waiting for the writer thread; excess dropped
+    LOG_SAMPLING: Dict[str, float] = {}  # logger prefix -> fraction of DEBUG/INFO kept
+    LOG_RATE_LIMITS: Dict[str, int] = {"app.utils.rate_limiter": 20}  # records/s
+
     # === General ===
     ENV: str = "development"
     DEBUG: bool = True
     LOG_LEVEL: str = "INFO"
 
     PROFILE: int = 0
+    PROFILE_MODE: str = "sample"  # "sample" (stack sampler) or "cprofile" (.prof files)
+    PROFILE_SAMPLE_INTERVAL: float = 0.01  # seconds between stack samples
+    PROFILE_MAX_STACKS: int = 5000  # distinct stacks kept per route
+    PROFILE_REQUEST_RATE: float = 0.01  # fraction of requests cProfiled
+    PROFILE_DIR: str = "/app/profiles"
+    PROFILE_MAX_FILES: int = 200  # newest .prof files kept
+    METRICS_SNAPSHOT_TTL: float = 2.0  # seconds /system/metrics reuses a snapshot
+    REQUEST_TIMING: bool = True  # per-stage latency histograms
+    SERVER_TIMING_HEADER: bool = True  # expose stage timings to clients
     POSTGRES_USER: str = "myuser"
     POSTGRES_PASSWORD: str = "mypassword"
     POSTGRES_DB: str = "mydb"
@@ -1,25 +1,277 @@
 """
 Async SQLAlchemy database setup.
+
+The connection pool is sized from Settings and instrumented for Prometheus:
+per-engine checked-out / overflow gauges plus checkout-wait (excluding
+connect time) and connect-latency histograms.
+
+Optional read replicas (DATABASE_REPLICA_URLS) serve `get_read_db` sessions,
+balanced round-robin or by fewest checked-out connections. Unhealthy replicas
+are skipped (falling back to the primary), and a client that just wrote is
+pinned to the primary for DB_READ_YOUR_WRITES_WINDOW seconds via a cookie.
 """
 
+import math
+import time
+import asyncio
+import logging
+import itertools
 from collections.abc import AsyncGenerator
+from contextvars import ContextVar
+from fastapi import Request, Response
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.utils.request_timing import instrument_engine
+
+logger = logging.getLogger("app.core.database")
+
+# === Prometheus Metrics ===
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection",
+    buckets=_LATENCY_BUCKETS,
+)
+db_pool_connect_latency = Histogram(
+    "db_pool_connect_seconds",
+    "Time to establish a new DB connection",
+    buckets=_LATENCY_BUCKETS,
+)
+db_pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that hit DB_POOL_TIMEOUT"
+)
+db_read_sessions = Counter(
+    "db_read_sessions_total", "Read-only sessions by target", ["target"]
+)
+db_replica_healthy = Gauge(
+    "db_replica_healthy", "1 if the read replica passes health checks", ["replica"]
+)
+# Pool gauges, evaluated at scrape time; `engine` is "primary" or "replica<N>"
+db_pool_size = Gauge("db_pool_size", "Configured DB pool size", ["engine"])
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out", "DB connections currently checked out", ["engine"]
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow", "Overflow DB connections in use", ["engine"]
+)
+
+# Seconds spent opening new connections inside the current checkout
+_connect_seconds: ContextVar[float] = ContextVar("db_connect_seconds", default=0.0)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts and new connections take.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        token = _connect_seconds.set(0.0)
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            db_pool_checkout_timeouts.inc()
+            raise
+        finally:
+            # Opening a new connection is reported by db_pool_connect_seconds
+            connect = _connect_seconds.get()
+            _connect_seconds.reset(token)
+            db_pool_checkout_wait.observe(
+                max(time.perf_counter() - start - connect, 0.0)
+            )
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - start
+            db_pool_connect_latency.observe(elapsed)
+            _connect_seconds.set(_connect_seconds.get() + elapsed)
+
+
+def _engine_options(url: str) -> dict:
+    options = {"echo": settings.DB_ECHO}
+    if url.startswith("sqlite"):
+        return options  # SQLite picks its own pool
+
+    options.update(
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if "+asyncpg" in url:
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
 
 # === Engine & Session ===
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_async_engine(
+    settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL)
+)
 async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
 Base = declarative_base()
 
+# === Read replicas ===
+replica_engines = [
+    create_async_engine(url, **_engine_options(url))
+    for url in settings.DATABASE_REPLICA_URLS
+]
+_replica_session_factories = [
+    async_sessionmaker(e, expire_on_commit=False) for e in replica_engines
+]
+# Statements count towards the request's "db" stage
+for _engine in (engine, *replica_engines):
+    instrument_engine(_engine)
+_replica_healthy = [True] * len(replica_engines)
+_round_robin = itertools.count()
+_health_task: asyncio.Task | None = None
+
+# Cookie pinning a client's reads to the primary right after it writes
+READ_PRIMARY_COOKIE = "db_read_primary_until"
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+# === Pool gauges ===
+def watch_pool(name: str, pool) -> None:
     """
-    Dependency for getting an async database session.
+    Export `pool`'s size, checked-out and overflow gauges as engine=`name`.
+    """
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return  # e.g. SQLite's own pools
+    db_pool_size.labels(engine=name).set_function(pool.size)
+    db_pool_checked_out.labels(engine=name).set_function(pool.checkedout)
+    db_pool_overflow.labels(engine=name).set_function(
+        lambda: max(pool.overflow(), 0)
+    )
+
+
+watch_pool("primary", engine.pool)
+for _i, _replica in enumerate(replica_engines):
+    watch_pool(f"replica{_i}", _replica.pool)
+
+
+def _checked_out(engine) -> int:
+    # Pools without checkout tracking (e.g. SQLite's NullPool) count as idle
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+def read_session_factory() -> async_sessionmaker:
+    """
+    Pick a healthy replica's session factory, or the primary's if none is.
+    """
+    healthy = [i for i, ok in enumerate(_replica_healthy) if ok]
+    if not healthy:
+        db_read_sessions.labels(target="primary").inc()
+        return async_session_factory
+    if settings.DB_REPLICA_BALANCING == "least_connections":
+        index = min(healthy, key=lambda i: _checked_out(replica_engines[i]))
+    else:
+        index = healthy[next(_round_robin) % len(healthy)]
+    db_read_sessions.labels(target=f"replica{index}").inc()
+    return _replica_session_factories[index]
+
+
+async def _check_replicas() -> None:
+    for i, replica in enumerate(replica_engines):
+        try:
+            async with asyncio.timeout(settings.DB_REPLICA_HEALTH_TIMEOUT):
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            healthy = True
+        except Exception as e:
+            healthy = False
+            if _replica_healthy[i]:
+                logger.warning(f"⚠️ Read replica {i} unhealthy, using others: {e}")
+        if healthy and not _replica_healthy[i]:
+            logger.info(f"✅ Read replica {i} healthy again")
+        _replica_healthy[i] = healthy
+        db_replica_healthy.labels(replica=str(i)).set(int(healthy))
+
+
+async def _run_health_checks() -> None:
+    while True:
+        await _check_replicas()
+        await asyncio.sleep(settings.DB_REPLICA_HEALTH_INTERVAL)
+
+
+async def start_replica_health_checks() -> None:
+    """
+    Start periodic replica health checks (no-op without replicas).
+    """
+    global _health_task
+    if replica_engines and _health_task is None:
+        _health_task = asyncio.create_task(_run_health_checks())
+
+
+async def stop_replica_health_checks() -> None:
+    global _health_task
+    if _health_task is not None:
+        _health_task.cancel()
+        try:
+            await _health_task
+        except asyncio.CancelledError:
+            pass
+        _health_task = None
+    for replica in replica_engines:
+        await replica.dispose()
+
+
+async def get_db(
+    request: Request, response: Response
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting an async database session (primary).
     Ensures session is cleaned up after each request.
+    Write requests also pin the client's reads to the primary for a short window.
     """
+    if replica_engines and request.method not in _SAFE_METHODS:
+        window = settings.DB_READ_YOUR_WRITES_WINDOW
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            f"{time.time() + window:.3f}",
+            max_age=math.ceil(window),
+            httponly=True,
+            samesite="lax",
+        )
     async with async_session_factory() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for a read-only session, routed to a replica when configured.
+    """
+    if not replica_engines:
+        factory = async_session_factory
+    elif _wrote_recently(request):
+        db_read_sessions.labels(target="primary").inc()
+        factory = async_session_factory
+    else:
+        factory = read_session_factory()
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
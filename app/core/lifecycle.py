@@ -5,7 +5,12 @@ Application startup and shutdown lifecycle management.
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.utils import redis_manager
+from app.auth.password_utils import shutdown_hash_pool
+from app.core.database import start_replica_health_checks, stop_replica_health_checks
+from app.queue.status_stream import status_hub
+from app.utils import redis_manager, cache_invalidation
+from app.utils.rate_limiter import start_rate_limiter, stop_rate_limiter
+from app.utils.stack_sampler import sampler
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +24,26 @@ async def lifespan(app: FastAPI):
     try:
         await redis_manager.init_redis()
         logger.info("🚀 Redis connected successfully.")
+        if redis_manager.redis_client:
+            await cache_invalidation.start_listener(redis_manager.redis_client)
+        if redis_manager.redis_bytes_client:
+            await status_hub.start(redis_manager.redis_bytes_client)
     except Exception as e:
         logger.error(f"❌ Redis connection failed: {e}")
 
+    await start_rate_limiter()
+    await start_replica_health_checks()
+
     yield  # ---- Application runs here ----
 
+    shutdown_hash_pool()
+    sampler.stop()
+    await stop_rate_limiter()
+    await stop_replica_health_checks()
+
     try:
+        await cache_invalidation.stop_listener()
+        await status_hub.stop()
         await redis_manager.close_redis()
         logger.info("🧹 Redis connection closed.")
     except Exception as e:
@@ -4,23 +4,36 @@ Scheduled Redis cleanup script (used by Docker job-cleaner service).
 
 import asyncio
 import logging
-from app.tasks import clean_old_jobs
+from prometheus_client import start_http_server
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.queue.cleaner import clean_registries
+from app.utils.logging_utils import setup_logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("app.cron_cleaner")
 
 
-async def run_cleanup(interval: int = 300):
+async def run_cleanup(interval: int = settings.CLEANER_INTERVAL):
     """
     Periodically runs Redis job cleanup every `interval` seconds.
     """
-    while True:
-        logger.info("🧹 Running scheduled Redis cleanup...")
-        clean_old_jobs()
-        await asyncio.sleep(interval)
+    redis = Redis.from_url(settings.REDIS_URL)
+    try:
+        while True:
+            logger.info("🧹 Running scheduled Redis cleanup...")
+            try:
+                await clean_registries(redis)
+            except Exception as e:
+                logger.error(f"❌ Cleanup pass failed: {e}")
+            await asyncio.sleep(interval)
+    finally:
+        await redis.aclose()
 
 
 if __name__ == "__main__":
+    setup_logging()
+    if settings.CLEANER_METRICS_PORT:
+        start_http_server(settings.CLEANER_METRICS_PORT)
     try:
         asyncio.run(run_cleanup())
     except KeyboardInterrupt:
@@ -3,11 +3,17 @@ Main FastAPI application entry point.
 """
 
 from fastapi import FastAPI
+from prometheus_client import REGISTRY
 from prometheus_fastapi_instrumentator import Instrumentator
 from app.core.lifecycle import lifespan
 from app.core.router_registry import register_routers
-from app.utils.rate_limiter import rate_limiter
+from app.queue.metrics import queue_stats
+from app.utils.rate_limiter import RateLimitMiddleware
 from app.utils.profile_middleware import RequestProfilerMiddleware
+from app.utils.request_timing import RequestTimingMiddleware
+from app.utils.logging_utils import RequestIdMiddleware, setup_logging
+
+setup_logging()
 
 app = FastAPI(
     title="Async FastAPI Starter",
@@ -17,14 +23,19 @@ app = FastAPI(
 )
 
 # === Middleware ===
-app.middleware("http")(rate_limiter)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestProfilerMiddleware)
+# Outermost, so rate-limit Redis calls are timed too
+app.add_middleware(RequestTimingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 # === Routers ===
 register_routers(app)
 
 # === Monitoring ===
 Instrumentator().instrument(app).expose(app)
+# Queue and registry sizes, read from Redis at scrape time
+REGISTRY.register(queue_stats)
 
 
 # === Healthcheck ===
@@ -2,24 +2,73 @@
 System monitoring routes exposing Prometheus metrics in JSON.
 """
 
-from prometheus_client import REGISTRY
-from fastapi import APIRouter, Response
+from typing import Annotated, List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
+from pydantic import Field
 import json
+from app.core.config import settings
+from app.utils.metrics_snapshot import DEFAULT_QUANTILES, MetricsSnapshot, render
+from app.utils.request_timing import TimedRoute
+from app.utils.stack_sampler import sampler
 
-router = APIRouter(prefix="/system", tags=["System"])
+router = APIRouter(prefix="/system", tags=["System"], route_class=TimedRoute)
+
+snapshot = MetricsSnapshot(ttl=settings.METRICS_SNAPSHOT_TTL)
 
 
 @router.get("/metrics", summary="Get Prometheus metrics as JSON")
-def get_metrics():
-    """
-    Collect all Prometheus metrics and return them as a formatted JSON response.
+async def get_metrics(
+    name: Optional[List[str]] = Query(None, description="Exact metric name(s)"),
+    prefix: Optional[str] = Query(None, description='e.g. "http_"'),
+    q: List[Annotated[float, Field(ge=0, le=1)]] = Query(list(DEFAULT_QUANTILES)),
+    buckets: bool = False,
+):
     """
-    metrics_data = {}
-    for metric in REGISTRY.collect():
-        samples = {s.name: s.value for s in metric.samples}
-        metrics_data[metric.name] = samples
+    Prometheus metrics as JSON, one entry per labelled series.
 
+    The registry is collected at most once per METRICS_SNAPSHOT_TTL seconds.
+    Histograms come with server-side percentiles (`q`); raw cumulative
+    buckets are included with `buckets=true`.
+    """
+    taken_at, metrics = await snapshot.get()
+    body = {
+        "generated_at": taken_at,
+        "metrics": render(metrics, name, prefix, q, buckets),
+    }
     return Response(
-        content=json.dumps(metrics_data, indent=2),
+        content=json.dumps(body, separators=(",", ":")),
         media_type="application/json",
     )
+
+
+@router.get("/profile", summary="Aggregated sampling-profiler stacks")
+async def get_profile(
+    route: Optional[str] = Query(None, description='e.g. "GET /users/"'),
+    format: Literal["collapsed", "json", "routes"] = "collapsed",
+    reset: bool = False,
+):
+    """
+    Return stacks collected by the sampling profiler (PROFILE=1, PROFILE_MODE=sample).
+
+    - `collapsed`: one `route;frame;...;frame count` line per stack, ready for
+      flamegraph.pl or speedscope.
+    - `json`: nested `{name, value, children}` tree for d3-flame-graph.
+    - `routes`: sample count per route.
+    """
+    if settings.PROFILE != 1 or settings.PROFILE_MODE != "sample":
+        raise HTTPException(
+            status_code=409,
+            detail="Sampling profiler disabled (set PROFILE=1 and PROFILE_MODE=sample).",
+        )
+
+    if format == "routes":
+        body = sampler.routes()
+    elif format == "json":
+        body = sampler.tree(route)
+    else:
+        body = PlainTextResponse(sampler.collapsed(route))
+
+    if reset:
+        sampler.reset()
+    return body
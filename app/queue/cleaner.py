@@ -0,0 +1,192 @@
+"""
+Incremental cleanup of RQ job registries.
+
+Registries are walked in chunks of CLEANER_CHUNK_SIZE. Each chunk is one
+Lua call that picks the entries, unlinks their job hash, dependency sets and
+result stream, and removes them from the registry. Job bodies are never
+fetched, and Redis is never busy for more than one chunk at a time.
+
+The finished and failed registries score entries by expiry time (+inf for
+"never"), so their rules are expressed against that score:
+- `grace`: delete entries whose expiry passed more than `grace` seconds ago
+- `max_entries`: beyond that, delete the soonest-expiring (oldest) entries
+
+Deferred jobs are still waiting on a dependency and are never deleted here.
+Started jobs whose heartbeat is more than CLEANER_STARTED_GRACE seconds late
+are handed to RQ's own abandoned-job handling (retry, or move to the failed
+registry) rather than deleted.
+
+The Lua script derives job keys from registry entries instead of receiving
+them in KEYS, so it needs a single Redis node; like RQ itself, it does not
+support Redis Cluster.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+from prometheus_client import Counter, Histogram
+from redis import Redis as SyncRedis
+from redis.asyncio import Redis
+from rq import Queue
+from rq.job import Job
+from rq.registry import FailedJobRegistry, FinishedJobRegistry, StartedJobRegistry
+from rq.results import Result
+from app.core.config import settings
+from app.queue.worker import redis_conn
+
+logger = logging.getLogger("app.queue.cleaner")
+
+# === Prometheus Metrics ===
+registry_cleaned = Counter(
+    "rq_registry_cleaned_total", "Jobs removed by the registry cleaner", ["registry"]
+)
+cleanup_latency = Histogram(
+    "rq_cleanup_pass_seconds",
+    "Duration of one full cleanup pass over every queue",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+# KEYS[1] registry; ARGV: mode, grace, limit, job key prefix, result key prefix.
+# Job keys are built from the entries, so this only runs on a single node.
+_CLEAN_CHUNK_LUA = """
+local limit = tonumber(ARGV[3])
+local ids
+if ARGV[1] == 'expired' then
+    local cutoff = tonumber(redis.call('TIME')[1]) - tonumber(ARGV[2])
+    ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. cutoff, 'LIMIT', 0, limit)
+else
+    ids = redis.call('ZRANGE', KEYS[1], 0, limit - 1)
+end
+for _, id in ipairs(ids) do
+    local job = ARGV[4] .. id
+    redis.call('UNLINK', job, job .. ':dependents', job .. ':dependencies', ARGV[5] .. id)
+end
+if #ids > 0 then
+    redis.call('ZREM', KEYS[1], unpack(ids))
+end
+return #ids
+"""
+
+
+@dataclass(frozen=True)
+class RegistryRule:
+    name: str
+    key_template: str
+    grace: Optional[int]  # None: never delete by score (cap only)
+    max_entries: Optional[int] = None  # None: no cap
+
+
+def default_rules() -> list[RegistryRule]:
+    """
+    Retention rules built from the CLEANER_* settings.
+    """
+    return [
+        RegistryRule(
+            "finished",
+            FinishedJobRegistry.key_template,
+            0,
+            settings.CLEANER_MAX_FINISHED or None,
+        ),
+        RegistryRule(
+            "failed",
+            FailedJobRegistry.key_template,
+            0,
+            settings.CLEANER_MAX_FAILED or None,
+        ),
+    ]
+
+
+async def _queue_names(redis: Redis) -> list[str]:
+    prefix = Queue.redis_queue_namespace_prefix
+    keys = await redis.smembers(Queue.redis_queues_keys)
+    names = []
+    for key in keys:
+        key = key.decode() if isinstance(key, bytes) else key
+        if key.startswith(prefix):
+            names.append(key[len(prefix) :])
+    return sorted(names)
+
+
+def fail_abandoned_jobs(
+    queue_name: str, grace: int, connection: SyncRedis = redis_conn
+) -> int:
+    """
+    Retry or move to "failed" the started jobs of `queue_name` whose
+    heartbeat is more than `grace` seconds late, as RQ workers do during
+    maintenance. Blocking; these jobs are few, so fetching them is fine.
+    """
+    registry = StartedJobRegistry(queue_name, connection=connection)
+    return len(registry.cleanup(time.time() - grace))
+
+
+async def clean_registries(
+    redis: Redis,
+    rules: Optional[Sequence[RegistryRule]] = None,
+    chunk_size: int = settings.CLEANER_CHUNK_SIZE,
+    started_grace: Optional[int] = settings.CLEANER_STARTED_GRACE,
+) -> dict[str, int]:
+    """
+    Run one cleanup pass over every known queue.
+    Returns the number of jobs removed per registry
+    (`started_grace=None` leaves abandoned started jobs to the workers).
+    """
+    rules = default_rules() if rules is None else rules
+    script = redis.register_script(_CLEAN_CHUNK_LUA)
+    job_prefix = Job.redis_job_namespace_prefix
+    result_prefix = Result.get_key("")
+    cleaned = {rule.name: 0 for rule in rules}
+    if started_grace is not None:
+        cleaned["started"] = 0
+
+    async def run_chunk(key: str, mode: str, grace: int, limit: int) -> int:
+        removed = await script(
+            keys=[key], args=[mode, grace, limit, job_prefix, result_prefix]
+        )
+        return int(removed)
+
+    start = time.perf_counter()
+    for queue_name in await _queue_names(redis):
+        if started_grace is not None:
+            failed = await asyncio.to_thread(
+                fail_abandoned_jobs, queue_name, started_grace
+            )
+            if failed:
+                cleaned["started"] += failed
+                registry_cleaned.labels(registry="started").inc(failed)
+                logger.info(f"🧹 Failed {failed} abandoned jobs of {queue_name}")
+
+        for rule in rules:
+            key = rule.key_template.format(queue_name)
+            removed = 0
+
+            if rule.grace is not None:
+                while True:
+                    n = await run_chunk(key, "expired", rule.grace, chunk_size)
+                    removed += n
+                    if n < chunk_size:
+                        break
+
+            if rule.max_entries is not None:
+                excess = await redis.zcard(key) - rule.max_entries
+                while excess > 0:
+                    n = await run_chunk(key, "oldest", 0, min(excess, chunk_size))
+                    if n == 0:
+                        break
+                    removed += n
+                    excess -= n
+
+            if removed:
+                cleaned[rule.name] += removed
+                registry_cleaned.labels(registry=rule.name).inc(removed)
+                logger.info(f"🧹 Removed {removed} jobs from {key}")
+            # Let other tasks run between registries
+            await asyncio.sleep(0)
+
+    elapsed = time.perf_counter() - start
+    cleanup_latency.observe(elapsed)
+    logger.info(
+        f"🧹 Cleanup pass removed {sum(cleaned.values())} jobs in {elapsed:.2f}s"
+    )
+    return cleaned
@@ -0,0 +1,393 @@
+"""
+Concurrent RQ worker: runs many jobs at once in one process.
+
+`rq worker` forks a work horse per job and waits for it, so a worker whose
+jobs mostly wait on I/O sits idle. This worker keeps up to
+WORKER_CONCURRENCY jobs running on a thread pool. Coroutine tasks share one
+event loop, and tasks marked `@cpu_bound` are sent to a process pool. Each
+job still goes through RQ's own `perform_job`, so registries, results,
+callbacks and `Retry` behave exactly as under `rq worker`.
+
+Run with:  python -m app.queue.concurrent_worker [queue ...] [--burst]
+"""
+
+import argparse
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from rq import SimpleWorker
+from rq.job import Job
+from rq.timeouts import TimerDeathPenalty
+from rq.utils import utcnow
+from rq.worker import StopRequested, WorkerStatus
+from app.core.config import settings
+from app.queue.metrics import jobs_finished
+from app.queue.worker import redis_conn
+from app.utils.logging_utils import setup_logging
+
+logger = logging.getLogger("app.queue.concurrent_worker")
+
+# === Prometheus Metrics ===
+worker_in_flight = Gauge(
+    "worker_jobs_in_flight", "Jobs executing in this worker", ["executor"]
+)
+worker_prefetched = Gauge(
+    "worker_jobs_prefetched", "Jobs dequeued and waiting for a free slot"
+)
+worker_jobs = Counter(
+    "worker_jobs_total", "Jobs completed by this worker", ["executor", "outcome"]
+)
+worker_job_latency = Histogram(
+    "worker_job_seconds",
+    "Job execution time including RQ bookkeeping",
+    ["executor"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+
+def cpu_bound(func: Callable) -> Callable:
+    """
+    Mark a task as CPU-bound so the concurrent worker runs it in its process
+    pool rather than on a thread. The task must be a module-level function.
+    """
+    func.rq_executor = "process"
+    return func
+
+
+def executor_for(job: Job) -> str:
+    """
+    "process", "async" or "thread". `job.meta["executor"]` overrides the
+    task's own marker.
+    """
+    try:
+        func = job.func
+    except Exception:
+        return "thread"  # perform_job reports the import error
+    kind = job.meta.get("executor") or getattr(func, "rq_executor", None)
+    if kind:
+        return kind
+    return "async" if inspect.iscoroutinefunction(func) else "thread"
+
+
+class PooledJob(Job):
+    """
+    Job that runs coroutine tasks on the worker's shared event loop and
+    `@cpu_bound` tasks in its process pool instead of the calling thread.
+    """
+
+    event_loop: asyncio.AbstractEventLoop | None = None
+    process_pool: ProcessPoolExecutor | None = None
+
+    def _execute(self):
+        kind = executor_for(self)
+        if kind == "process" and self.process_pool is not None:
+            future = self.process_pool.submit(self.func, *self.args, **self.kwargs)
+        elif kind == "async" and self.event_loop is not None:
+            future = asyncio.run_coroutine_threadsafe(
+                self.func(*self.args, **self.kwargs), self.event_loop
+            )
+        else:
+            return super()._execute()
+        try:
+            # Wait in short slices: a job timeout is raised in this thread
+            # as an async exception, which a blocking wait would never see
+            while not wait([future], timeout=1.0).done:
+                pass
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+
+class ConcurrentWorker(SimpleWorker):
+    """
+    RQ worker running up to `concurrency` jobs at once, with `prefetch`
+    more dequeued ahead so a freed slot never waits on Redis.
+
+    A first SIGINT/SIGTERM stops dequeuing, lets running jobs finish and
+    pushes prefetched ones back to the front of their queue; a second one
+    exits immediately.
+    """
+
+    job_class = PooledJob
+    # SIGALRM only works on the main thread
+    death_penalty_class = TimerDeathPenalty
+    # Seconds an idle dequeue blocks before re-checking for shutdown
+    dequeue_poll_interval = 5
+
+    def __init__(
+        self,
+        *args,
+        concurrency: int = settings.WORKER_CONCURRENCY,
+        prefetch: int = settings.WORKER_PREFETCH,
+        processes: int | None = settings.WORKER_PROCESSES,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.concurrency = max(1, concurrency)
+        self.prefetch = max(0, prefetch)
+        self.processes = processes
+        self._slots = threading.BoundedSemaphore(self.concurrency + self.prefetch)
+        self._threads = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="rq-job"
+        )
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._in_flight: dict[Future, tuple[Job, object]] = {}
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self._heartbeat_stop = threading.Event()
+
+    # --- Executors ---
+
+    def _get_process_pool(self) -> ProcessPoolExecutor | None:
+        if self.processes == 0:
+            return None
+        with self._lock:
+            if self._process_pool is None:
+                # The worker already runs threads; forking them is unsafe
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._process_pool
+
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="rq-async", daemon=True
+                )
+                self._loop_thread.start()
+        return self._loop
+
+    # --- Job execution ---
+
+    def _run_job(self, job: Job, queue) -> None:
+        kind = executor_for(job)
+        if kind == "process":
+            job.process_pool = self._get_process_pool()
+        elif kind == "async":
+            job.event_loop = self._get_event_loop()
+
+        with self._lock:
+            self._running.add(job.id)
+        worker_prefetched.dec()
+        worker_in_flight.labels(executor=kind).inc()
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = self.perform_job(job, queue)
+        except Exception:
+            self.log.exception("Job %s: unhandled error in worker", job.id)
+        finally:
+            worker_in_flight.labels(executor=kind).dec()
+            worker_job_latency.labels(executor=kind).observe(
+                time.perf_counter() - start
+            )
+            worker_jobs.labels(
+                executor=kind, outcome="finished" if ok else "failed"
+            ).inc()
+            if ok:
+                # Counted once, where the job completes
+                jobs_finished.inc()
+            with self._lock:
+                self._running.discard(job.id)
+
+    def _job_done(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(future, None)
+        self._slots.release()
+
+    def execute_job(self, job: Job, queue) -> None:
+        """
+        Hand the job to the thread pool; returns without waiting for it.
+        """
+        worker_prefetched.inc()
+        future = self._threads.submit(self._run_job, job, queue)
+        with self._lock:
+            self._in_flight[future] = (job, queue)
+        future.add_done_callback(self._job_done)
+
+    # --- Heartbeats ---
+
+    def _send_heartbeats(self) -> None:
+        with self._lock:
+            running = [
+                job for job, _ in self._in_flight.values() if job.id in self._running
+            ]
+        with self.connection.pipeline() as pipe:
+            self.heartbeat(self.job_monitoring_interval + 60, pipeline=pipe)
+            for job in running:
+                ttl = self.get_heartbeat_ttl(job)
+                job.heartbeat(utcnow(), ttl, pipeline=pipe, xx=True)
+            pipe.execute()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._heartbeat_stop.wait(self.job_monitoring_interval):
+            try:
+                self._send_heartbeats()
+            except Exception as e:
+                logger.warning(f"⚠️ Worker heartbeat failed: {e}")
+
+    # --- Shutdown ---
+
+    def _shutdown(self):
+        # Never raise out of a blocking dequeue; the loop checks this flag
+        # at least every `dequeue_poll_interval` seconds
+        self._stop_requested = True
+        self.set_shutdown_requested_date()
+        self.log.info(
+            "Worker %s: finishing %d running job(s). "
+            "Press Ctrl+C again for a cold shutdown.",
+            self.key,
+            len(self._running),
+        )
+
+    def _requeue_prefetched(self) -> int:
+        """
+        Cancel jobs that never started and put them back at the front of
+        their queue, so they are not left in RQ's intermediate queue.
+        """
+        with self._lock:
+            queued = list(self._in_flight.items())
+        # cancel() only succeeds for jobs that have not started
+        pending = [(job, q) for future, (job, q) in queued if future.cancel()]
+        if not pending:
+            return 0
+        with self.connection.pipeline() as pipe:
+            # Reversed so LPUSH restores the original order
+            for job, queue in reversed(pending):
+                pipe.lrem(queue.intermediate_queue_key, 1, job.id)
+                pipe.lpush(queue.key, job.id)
+            pipe.execute()
+        worker_prefetched.dec(len(pending))
+        return len(pending)
+
+    def _drain(self) -> None:
+        requeued = self._requeue_prefetched()
+        if requeued:
+            self.log.info(
+                "Worker %s: returned %d prefetched job(s)", self.key, requeued
+            )
+        self._threads.shutdown(wait=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+
+    # --- Main loop ---
+
+    def _wait_for_slot(self) -> bool:
+        while not self._stop_requested:
+            if self._slots.acquire(timeout=0.2):
+                return True
+        return False
+
+    def work(
+        self,
+        burst: bool = False,
+        logging_level: str = "INFO",
+        with_scheduler: bool = False,
+    ) -> bool:
+        """
+        Dequeue and run jobs until stopped (or, in burst mode, until every
+        queue is empty and all running jobs are done).
+        """
+        self.bootstrap(logging_level)
+        if with_scheduler:
+            self._start_scheduler(burst, logging_level)
+        self._install_signal_handlers()
+
+        heartbeats = threading.Thread(
+            target=self._heartbeat_loop, name="rq-heartbeat", daemon=True
+        )
+        heartbeats.start()
+        dequeued = 0
+        try:
+            while not self._stop_requested:
+                self.check_for_suspension(burst)
+                if self.should_run_maintenance_tasks:
+                    self.run_maintenance_tasks()
+                if not self._wait_for_slot():
+                    break
+                try:
+                    result = self.dequeue_job_and_maintain_ttl(
+                        None if burst else self.dequeue_timeout,
+                        None if burst else self.dequeue_poll_interval,
+                    )
+                except BaseException:
+                    self._slots.release()
+                    raise
+                if result is None:
+                    self._slots.release()
+                    if not burst:
+                        continue
+                    with self._lock:
+                        in_flight = list(self._in_flight)
+                    if not in_flight:
+                        self.log.info("Worker %s: done, quitting", self.key)
+                        break
+                    # Running jobs may still enqueue retries or dependents
+                    wait(in_flight, return_when=FIRST_COMPLETED)
+                    continue
+
+                job, queue = result
+                self.execute_job(job, queue)
+                self.set_state(WorkerStatus.BUSY)
+                dequeued += 1
+        except StopRequested:
+            pass
+        except SystemExit:
+            # Cold shutdown: running jobs are abandoned and later failed
+            # (or retried) by RQ's registry cleanup. Exit without joining
+            # the job threads.
+            self.log.warning("Worker %s: cold shutdown", self.key)
+            self.teardown()
+            os._exit(1)
+
+        self._drain()
+        self._heartbeat_stop.set()
+        heartbeats.join()
+        self.teardown()
+        return bool(dequeued)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a concurrent RQ worker.")
+    parser.add_argument("queues", nargs="*", default=["default"])
+    parser.add_argument(
+        "--burst", action="store_true", help="Quit once the queues are empty"
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT)
+    worker = ConcurrentWorker(args.queues, connection=redis_conn)
+    worker.work(
+        burst=args.burst,
+        logging_level=settings.LOG_LEVEL,
+        with_scheduler=settings.WORKER_WITH_SCHEDULER,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,24 +2,163 @@
 Prometheus metrics for job queue monitoring.
 """
 
+import logging
+import threading
+import time
 from prometheus_client import Counter, Gauge
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
 from rq import Queue
+from rq.job import Job
+from rq.registry import (
+    DeferredJobRegistry,
+    FailedJobRegistry,
+    FinishedJobRegistry,
+    ScheduledJobRegistry,
+    StartedJobRegistry,
+)
+from rq.utils import utcnow, utcparse
+from app.core.config import settings
 from app.queue.worker import redis_conn
 
+logger = logging.getLogger("app.queue.metrics")
+
 # === Counters ===
 jobs_created = Counter("jobs_created_total", "Jobs enqueued")
 jobs_failed = Counter("jobs_failed_total", "Jobs failed")
 jobs_finished = Counter("jobs_finished_total", "Jobs finished")
 rate_limited = Counter("rate_limited_total", "Rate-limited requests")
+job_stream_events = Counter(
+    "job_stream_events_total", "Job status changes pushed to streaming clients"
+)
 
 # === Gauges ===
-queue_length = Gauge("queue_length", "Current queue length", ["queue"])
+job_stream_subscribers = Gauge(
+    "job_stream_subscribers", "Open job status streams (SSE and WebSocket)"
+)
+
+REGISTRIES = {
+    "started": StartedJobRegistry.key_template.format(""),
+    "failed": FailedJobRegistry.key_template.format(""),
+    "finished": FinishedJobRegistry.key_template.format(""),
+    "deferred": DeferredJobRegistry.key_template.format(""),
+    "scheduled": ScheduledJobRegistry.key_template.format(""),
+}
+
+# One round trip for every queue: length, registry sizes and the
+# enqueue time of the job at the head of the queue (the oldest one).
+# KEYS[1] queue set; ARGV: queue key prefix, job key prefix, registry prefixes
+_QUEUE_STATS_LUA = """
+local out = {}
+for _, qkey in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    local name = string.sub(qkey, #ARGV[1] + 1)
+    local row = {name, redis.call('LLEN', qkey)}
+    for i = 3, #ARGV do
+        table.insert(row, redis.call('ZCARD', ARGV[i] .. name))
+    end
+    local head = redis.call('LINDEX', qkey, 0)
+    local enqueued_at = head and redis.call('HGET', ARGV[2] .. head, 'enqueued_at')
+    table.insert(row, enqueued_at or '')
+    table.insert(out, row)
+end
+return out
+"""
+
+
+class QueueStatsCollector(Collector):
+    """
+    Reads queue lengths, registry sizes and the oldest queued job's age at
+    scrape time, in a single Redis call cached for `ttl` seconds.
+    """
+
+    def __init__(self, redis, ttl: float):
+        self.ttl = ttl
+        self._script = redis.register_script(_QUEUE_STATS_LUA)
+        self._lock = threading.Lock()
+        self._stats: list[dict] = []
+        self._expires = 0.0
+
+    def _read(self) -> list[dict]:
+        rows = self._script(
+            keys=[Queue.redis_queues_keys],
+            args=[
+                Queue.redis_queue_namespace_prefix,
+                Job.redis_job_namespace_prefix,
+                *REGISTRIES.values(),
+            ],
+        )
+        now = utcnow()
+        stats = []
+        for name, length, *sizes, enqueued_at in rows:
+            age = None
+            if enqueued_at:
+                age = max((now - utcparse(enqueued_at.decode())).total_seconds(), 0)
+            stats.append(
+                {
+                    "queue": name.decode(),
+                    "length": int(length),
+                    "registries": dict(zip(REGISTRIES, map(int, sizes))),
+                    "oldest_job_age": age,
+                }
+            )
+        return sorted(stats, key=lambda s: s["queue"])
+
+    def snapshot(self) -> list[dict]:
+        """
+        Per-queue stats, re-read from Redis at most once per `ttl`.
+        """
+        with self._lock:
+            if time.monotonic() >= self._expires:
+                self._stats = self._read()
+                self._expires = time.monotonic() + self.ttl
+            return self._stats
+
+    def describe(self):
+        # Lets the registry check names without a Redis call at import time
+        yield GaugeMetricFamily("queue_length", "Jobs waiting in the queue")
+        yield GaugeMetricFamily("rq_registry_size", "Jobs in each RQ registry")
+        yield GaugeMetricFamily(
+            "rq_oldest_job_age_seconds", "Age of the oldest queued job"
+        )
+
+    def collect(self):
+        try:
+            stats = self.snapshot()
+        except Exception as e:
+            logger.warning(f"⚠️ Queue stats unavailable: {e}")
+            return
+
+        length = GaugeMetricFamily(
+            "queue_length", "Jobs waiting in the queue", labels=["queue"]
+        )
+        sizes = GaugeMetricFamily(
+            "rq_registry_size", "Jobs in each RQ registry", labels=["queue", "registry"]
+        )
+        age = GaugeMetricFamily(
+            "rq_oldest_job_age_seconds",
+            "Age of the oldest queued job",
+            labels=["queue"],
+        )
+        for s in stats:
+            length.add_metric([s["queue"]], s["length"])
+            for registry, size in s["registries"].items():
+                sizes.add_metric([s["queue"], registry], size)
+            age.add_metric([s["queue"]], s["oldest_job_age"] or 0)
+        yield length
+        yield sizes
+        yield age
+
+
+# Registered by the app (app.main) only, so workers importing the counters
+# above do not export a second copy of the queue gauges
+queue_stats = QueueStatsCollector(redis_conn, settings.QUEUE_METRICS_TTL)
 
 
 def update_queue_metrics() -> dict:
     """
-    Refresh queue size metrics for Prometheus.
+    Current queue stats. Prometheus now reads these at scrape time,
+    so nothing needs refreshing; kept for existing callers.
     """
-    q = Queue("default", connection=redis_conn)
-    queue_length.labels(queue="default").set(q.count)
-    return {"queue_length": q.count}
+    stats = queue_stats.snapshot()
+    default = next((s for s in stats if s["queue"] == "default"), None)
+    return {"queue_length": default["length"] if default else 0, "queues": stats}
@@ -2,39 +2,176 @@
 Queue-related API routes for job submission, status, and metrics.
 """
 
-from fastapi import APIRouter, HTTPException
-from app.queue.service import JobService
+import asyncio
+import json
+from typing import List
+from fastapi import APIRouter, HTTPException, Query, WebSocket
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.websockets import WebSocketDisconnect
+from app.core.config import settings
+from app.queue.schemas import BatchUploadRequest, JobStatusQuery, JobStreamRequest
+from app.queue.service import AsyncJobService, JobService
 from app.queue.metrics import update_queue_metrics
+from app.queue.status_stream import is_terminal, status_hub
+from app.utils import redis_manager
+from app.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/jobs", tags=["Jobs"])
+router = APIRouter(prefix="/jobs", tags=["Jobs"], route_class=TimedRoute)
+
+# One shared service (and RQ Queue) instead of one per request
+job_service = JobService()
+
+
+def _async_job_service() -> AsyncJobService:
+    if not redis_manager.redis_bytes_client:
+        raise HTTPException(status_code=500, detail="Redis not initialized")
+    return AsyncJobService(redis_manager.redis_bytes_client)
+
+
+# Registered before /upload/{filename} so "batch" is not taken as a filename
+@router.post("/upload/batch", summary="Enqueue many image processing jobs")
+async def upload_images(body: BatchUploadRequest):
+    """
+    Enqueue one image processing job per filename in a single Redis pipeline.
+    """
+    try:
+        jobs = await asyncio.to_thread(
+            job_service.enqueue_image_jobs, body.filenames
+        )
+        return {"job_ids": [job.id for job in jobs], "status": "queued"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job enqueue failed: {e}")
 
 
 @router.post("/upload/{filename}", summary="Enqueue image processing job")
-def upload_image(filename: str):
+async def upload_image(filename: str):
     """
     Enqueue a new image processing job.
     """
     try:
-        job = JobService().enqueue_image_job(filename)
+        # RQ's enqueue is blocking; keep it off the event loop
+        job = await asyncio.to_thread(job_service.enqueue_image_job, filename)
         return {"job_id": job.id, "status": "queued"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Job enqueue failed: {e}")
 
 
 @router.get("/status/{job_id}", summary="Get job status by ID")
-def job_status(job_id: str):
+async def job_status(job_id: str):
     """
     Retrieve the status and result of a specific job.
     """
+    service = _async_job_service()
     try:
-        return JobService().get_job_status(job_id)
-    except Exception as e:
+        return await service.get_job_status(job_id)
+    except LookupError as e:
         raise HTTPException(status_code=404, detail=f"Job not found: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job lookup failed: {e}")
+
+
+@router.post("/status", summary="Get many job statuses in one call")
+async def job_statuses(query: JobStatusQuery):
+    """
+    Fetch the requested fields of many jobs in a single Redis pipeline.
+    Results are only deserialized when "result" is among the fields.
+    """
+    service = _async_job_service()
+    try:
+        return {"jobs": await service.get_statuses(query.job_ids, query.fields)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job lookup failed: {e}")
+
+
+async def _sse_events(job_ids: List[str]):
+    sub = await status_hub.subscribe(job_ids)
+    pending = set(sub.job_ids)
+    try:
+        while pending:
+            try:
+                status = await asyncio.wait_for(
+                    sub.queue.get(), settings.JOBS_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if is_terminal(status):
+                pending.discard(status["job_id"])
+            data = json.dumps(status, default=str)
+            yield f"event: status\ndata: {data}\n\n".encode()
+        yield b"event: end\ndata: {}\n\n"
+    finally:
+        await status_hub.unsubscribe(sub)
+
+
+@router.get("/stream", summary="Stream job status changes (Server-Sent Events)")
+async def stream_job_statuses(job_id: List[str] = Query(...)):
+    """
+    Push a `status` event whenever one of the jobs changes state, starting
+    with its current state. The stream ends once every job is finished,
+    failed, stopped, canceled or unknown.
+    """
+    try:
+        query = JobStreamRequest(job_ids=job_id)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    if not status_hub.running:
+        raise HTTPException(status_code=503, detail="Job status stream unavailable")
+    return StreamingResponse(
+        _sse_events(query.job_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def job_status_socket(websocket: WebSocket):
+    """
+    WebSocket variant of /jobs/stream. The client sends
+    `{"job_ids": [...]}` once and receives one JSON message per change.
+    """
+    await websocket.accept()
+    try:
+        query = JobStreamRequest.model_validate_json(await websocket.receive_text())
+    except (ValidationError, WebSocketDisconnect):
+        await websocket.close(code=1008)
+        return
+    if not status_hub.running:
+        await websocket.close(code=1011)
+        return
+
+    sub = await status_hub.subscribe(query.job_ids)
+    pending = set(sub.job_ids)
+    # Any client frame or a disconnect ends the stream early
+    closed = asyncio.create_task(websocket.receive())
+    try:
+        while pending:
+            update = asyncio.create_task(sub.queue.get())
+            await asyncio.wait({update, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if not update.done():
+                update.cancel()
+                if closed.result()["type"] != "websocket.disconnect":
+                    await websocket.close()
+                return
+            status = update.result()
+            if is_terminal(status):
+                pending.discard(status["job_id"])
+            await websocket.send_text(json.dumps(status, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        await status_hub.unsubscribe(sub)
 
 
-@router.get("/metrics/update", summary="Refresh queue length metric")
+@router.get(
+    "/metrics/update", summary="Current queue and registry sizes", deprecated=True
+)
 def refresh_metrics():
     """
-    Update Prometheus queue length metric.
+    Queue stats as JSON. Prometheus reads them at scrape time now,
+    so calling this is no longer needed to keep `queue_length` fresh.
     """
     return update_queue_metrics()
@@ -0,0 +1,31 @@
+"""
+Pydantic schemas for job requests and responses.
+"""
+
+from typing import List, Literal
+from pydantic import BaseModel, Field
+from app.core.config import settings
+
+JobField = Literal[
+    "status", "result", "enqueued_at", "started_at", "ended_at", "retries_left"
+]
+
+
+class JobStatusQuery(BaseModel):
+    job_ids: List[str] = Field(
+        ..., min_length=1, max_length=settings.JOBS_STATUS_MAX_BATCH
+    )
+    # "result" is only unpickled when explicitly requested
+    fields: List[JobField] = ["status"]
+
+
+class BatchUploadRequest(BaseModel):
+    filenames: List[str] = Field(
+        ..., min_length=1, max_length=settings.JOBS_ENQUEUE_MAX_BATCH
+    )
+
+
+class JobStreamRequest(BaseModel):
+    job_ids: List[str] = Field(
+        ..., min_length=1, max_length=settings.JOBS_STREAM_MAX_JOBS
+    )
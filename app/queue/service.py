@@ -2,12 +2,30 @@
 Service layer for RQ job management.
 """
 
+from base64 import b64decode
+from typing import Iterable, List, Sequence
+from redis.asyncio import Redis
 from rq import Retry
 from rq.job import Job
 from rq import Queue
+from rq.serializers import DefaultSerializer
 from app.queue.worker import redis_conn
 from app.tasks import process_image
-from app.queue.metrics import jobs_created, jobs_finished, jobs_failed
+from app.queue.metrics import jobs_created, jobs_failed
+
+JOB_KEY_PREFIX = Job.redis_job_namespace_prefix
+RESULTS_KEY_PREFIX = "rq:results:"
+ALL_JOB_FIELDS = (
+    "status",
+    "result",
+    "enqueued_at",
+    "started_at",
+    "ended_at",
+    "retries_left",
+)
+
+# Retry policy shared by single and batch submissions
+IMAGE_JOB_RETRY = dict(max=3, interval=[5, 10, 20])
 
 
 class JobService:
@@ -27,13 +45,34 @@ class JobService:
             job = self.queue.enqueue(
                 process_image,
                 filename,
-                retry=Retry(max=3, interval=[5, 10, 20]),
+                retry=Retry(**IMAGE_JOB_RETRY),
             )
             return job
         except Exception as e:
             jobs_failed.inc()
             raise RuntimeError(f"Failed to enqueue job: {e}")
 
+    def enqueue_image_jobs(self, filenames: Sequence[str]) -> List[Job]:
+        """
+        Enqueue one image processing task per filename, with the same retry
+        logic, in a single Redis pipeline round trip.
+        """
+        jobs_created.inc(len(filenames))
+        try:
+            job_datas = [
+                Queue.prepare_data(
+                    process_image, (filename,), retry=Retry(**IMAGE_JOB_RETRY)
+                )
+                for filename in filenames
+            ]
+            with redis_conn.pipeline() as pipe:
+                jobs = self.queue.enqueue_many(job_datas, pipeline=pipe)
+                pipe.execute()
+            return jobs
+        except Exception as e:
+            jobs_failed.inc(len(filenames))
+            raise RuntimeError(f"Failed to enqueue jobs: {e}")
+
     def get_job_status(self, job_id: str) -> dict:
         """
         Retrieve the status and result of a queued job.
@@ -41,8 +80,6 @@ class JobService:
         try:
             job = Job.fetch(job_id, connection=redis_conn)
             status = job.get_status()
-            if status == "finished":
-                jobs_finished.inc()
             return {
                 "job_id": job.id,
                 "status": status,
@@ -54,3 +91,84 @@ class JobService:
         except Exception as e:
             jobs_failed.inc()
             raise RuntimeError(f"Error fetching job status: {e}")
+
+
+class AsyncJobService:
+    """
+    Reads RQ job state straight from Redis with `redis.asyncio`, fetching any
+    number of jobs in a single pipelined round trip.
+
+    Expects a client created with `decode_responses=False` (RQ stores
+    pickled payloads).
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    @staticmethod
+    def _decode_result(stream_entries: list, legacy_value: bytes | None):
+        # Redis >= 5: latest entry of the rq:results:<id> stream
+        if stream_entries:
+            _, payload = stream_entries[0]
+            value = payload.get(b"return_value")
+            if value is not None:
+                return DefaultSerializer.loads(b64decode(value))
+            return None
+        # Older servers keep the pickled result on the job hash
+        if legacy_value:
+            return DefaultSerializer.loads(legacy_value)
+        return None
+
+    async def get_statuses(
+        self, job_ids: Sequence[str], fields: Iterable[str] = ALL_JOB_FIELDS
+    ) -> list[dict]:
+        """
+        Return the requested fields for every job id, in order.
+        Unknown jobs come back as `{"job_id": ..., "found": False}`.
+        """
+        fields = list(dict.fromkeys(fields))
+        want_result = "result" in fields
+        hash_fields = ["status"] + [f for f in fields if f not in ("status", "result")]
+        if want_result:
+            hash_fields.append("result")
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.hmget(JOB_KEY_PREFIX + job_id, hash_fields)
+                if want_result:
+                    pipe.xrevrange(RESULTS_KEY_PREFIX + job_id, "+", "-", count=1)
+            replies = await pipe.execute()
+
+        step = 2 if want_result else 1
+        statuses = []
+        for i, job_id in enumerate(job_ids):
+            values = dict(zip(hash_fields, replies[i * step]))
+            if values["status"] is None:
+                statuses.append({"job_id": job_id, "found": False})
+                continue
+
+            item = {"job_id": job_id, "found": True}
+            for field in fields:
+                if field == "result":
+                    item["result"] = self._decode_result(
+                        replies[i * step + 1], values["result"]
+                    )
+                elif field == "retries_left":
+                    raw = values["retries_left"]
+                    item["retries_left"] = int(raw) if raw is not None else None
+                else:
+                    raw = values[field]
+                    item[field] = raw.decode() if raw else None
+            statuses.append(item)
+        return statuses
+
+    async def get_job_status(self, job_id: str) -> dict:
+        """
+        Retrieve the status and result of a single job.
+        Raises LookupError if the job does not exist.
+        """
+        (status,) = await self.get_statuses([job_id])
+        if not status["found"]:
+            raise LookupError(f"No such job: {job_id}")
+        del status["found"]
+        return status
@@ -0,0 +1,250 @@
+"""
+Push-based job status updates shared by every streaming client in a worker.
+
+One pub/sub connection per process subscribes to the Redis keyspace channel
+of each watched job (`__keyspace@<db>__:rq:job:<id>`). Any write to a job
+hash marks it dirty; a single refresher task then reads all dirty jobs in
+one pipeline and fans changed statuses out to the subscribers' queues.
+A job that reaches a terminal state is sent once more, with its result,
+and then no longer watched.
+
+Keyspace notifications need `notify-keyspace-events` to include `Kh`. When
+they are off (or a notification is lost) the refresher still re-reads every
+watched job each `poll_interval` seconds, in one pipeline for all clients.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Iterable
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.queue.metrics import job_stream_events, job_stream_subscribers
+from app.queue.service import JOB_KEY_PREFIX, AsyncJobService
+
+logger = logging.getLogger("app.queue.status_stream")
+
+TERMINAL_STATUSES = frozenset({"finished", "failed", "stopped", "canceled"})
+# Re-read on every change; "result" is only fetched once a job has finished
+STREAM_JOB_FIELDS = ("status", "enqueued_at", "started_at", "ended_at", "retries_left")
+
+
+def is_terminal(status: dict) -> bool:
+    """
+    True once a job can no longer change (or does not exist).
+    """
+    return not status["found"] or status["status"] in TERMINAL_STATUSES
+
+
+class JobSubscription:
+    """
+    One client's view of a set of jobs. Status changes arrive on `queue`.
+    """
+
+    def __init__(self, job_ids: Iterable[str]):
+        self.job_ids = list(dict.fromkeys(job_ids))
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._last: dict[str, str | None] = {}
+
+    def offer(self, status: dict) -> None:
+        # Only push real changes; a job hash is also written by heartbeats
+        state = status.get("status") if status["found"] else None
+        job_id = status["job_id"]
+        if job_id in self._last and self._last[job_id] == state:
+            return
+        self._last[job_id] = state
+        self.queue.put_nowait(status)
+        job_stream_events.inc()
+
+
+class JobStatusHub:
+    """
+    Fans job status changes out from one Redis connection to many clients.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._redis: Redis | None = None
+        self._service: AsyncJobService | None = None
+        self._channel_prefix = ""
+        self._pubsub = None
+        self._watchers: dict[str, set[JobSubscription]] = defaultdict(set)
+        self._dirty: set[str] = set()
+        self._wake = asyncio.Event()
+        self._has_channels = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def _channel(self, job_id: str) -> str:
+        return self._channel_prefix + job_id
+
+    def _mark_dirty(self, job_ids: Iterable[str]) -> None:
+        self._dirty.update(job_ids)
+        self._wake.set()
+
+    async def subscribe(self, job_ids: Iterable[str]) -> JobSubscription:
+        """
+        Watch `job_ids`. The current status of each job is pushed right away.
+        """
+        if self._pubsub is None:
+            raise RuntimeError("Job status stream not started")
+        sub = JobSubscription(job_ids)
+        new = [job_id for job_id in sub.job_ids if job_id not in self._watchers]
+        for job_id in sub.job_ids:
+            self._watchers[job_id].add(sub)
+        job_stream_subscribers.inc()
+        if new:
+            await self._pubsub.subscribe(*(self._channel(j) for j in new))
+            self._has_channels.set()
+        # Read after subscribing so no change can slip in between
+        self._mark_dirty(sub.job_ids)
+        return sub
+
+    async def unsubscribe(self, sub: JobSubscription) -> None:
+        """
+        Stop watching; drops the Redis subscription of jobs nobody watches.
+        """
+        idle = []
+        for job_id in sub.job_ids:
+            watchers = self._watchers.get(job_id)
+            if watchers is None:
+                continue
+            watchers.discard(sub)
+            if not watchers:
+                del self._watchers[job_id]
+                idle.append(job_id)
+        job_stream_subscribers.dec()
+        await self._drop_channels(idle)
+
+    async def _drop_channels(self, job_ids: list[str]) -> None:
+        if job_ids and self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(*(self._channel(j) for j in job_ids))
+            except Exception as e:
+                logger.warning(f"⚠️ Job stream unsubscribe failed: {e}")
+
+    async def _listen(self) -> None:
+        prefix = self._channel_prefix.encode()
+        while True:
+            if not self._pubsub.subscribed:
+                self._has_channels.clear()
+                await self._has_channels.wait()
+                continue
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Job stream listener lost connection: {e}")
+                # Notifications may have been missed while disconnected
+                self._mark_dirty(self._watchers)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, str):
+                channel = channel.encode()
+            if channel.startswith(prefix):
+                self._mark_dirty([channel[len(prefix) :].decode()])
+
+    async def _refresh(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                job_ids, self._dirty = self._dirty, set()
+            except asyncio.TimeoutError:
+                # Safety net for missed (or disabled) notifications
+                job_ids = set(self._watchers)
+            self._wake.clear()
+            job_ids = [j for j in job_ids if j in self._watchers]
+            if not job_ids:
+                continue
+            try:
+                statuses = await self._read(job_ids)
+            except Exception as e:
+                logger.error(f"Job stream refresh failed: {e}")
+                self._dirty.update(job_ids)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            done = []
+            for status in statuses:
+                job_id = status["job_id"]
+                for sub in list(self._watchers.get(job_id, ())):
+                    sub.offer(status)
+                if is_terminal(status) and self._watchers.pop(job_id, None):
+                    done.append(job_id)
+            # Terminal jobs cannot change again: stop re-reading them
+            await self._drop_channels(done)
+
+    async def _read(self, job_ids: list[str]) -> list[dict]:
+        statuses = await self._service.get_statuses(job_ids, STREAM_JOB_FIELDS)
+        finished = [
+            s["job_id"] for s in statuses if s["found"] and s["status"] == "finished"
+        ]
+        results = {}
+        if finished:
+            for item in await self._service.get_statuses(finished, ("result",)):
+                results[item["job_id"]] = item.get("result")
+        for status in statuses:
+            if status["found"]:
+                status["result"] = results.get(status["job_id"])
+        return statuses
+
+    async def _check_notifications(self) -> None:
+        try:
+            config = await self._redis.config_get("notify-keyspace-events")
+        except Exception:
+            return  # CONFIG is often disabled on managed Redis
+        flags = next(iter(config.values()), b"")
+        if isinstance(flags, bytes):
+            flags = flags.decode()
+        if "K" not in flags or ("h" not in flags and "A" not in flags):
+            logger.warning(
+                "⚠️ Redis keyspace notifications are off "
+                "(notify-keyspace-events needs 'Kh'); job streams fall back "
+                f"to polling every {self.poll_interval}s."
+            )
+
+    async def start(self, redis: Redis) -> None:
+        """
+        Start the shared listener and refresher (idempotent).
+        Expects a client created with `decode_responses=False`.
+        """
+        if self._tasks:
+            return
+        self._redis = redis
+        self._service = AsyncJobService(redis)
+        db = redis.connection_pool.connection_kwargs.get("db", 0)
+        self._channel_prefix = f"__keyspace@{db}__:{JOB_KEY_PREFIX}"
+        self._pubsub = redis.pubsub()
+        await self._check_notifications()
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._refresh()),
+        ]
+
+    async def stop(self) -> None:
+        """
+        Cancel the background tasks and release the pub/sub connection.
+        """
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+status_hub = JobStatusHub(settings.JOBS_STREAM_POLL_INTERVAL)
@@ -3,10 +3,22 @@ Base repository class providing reusable CRUD patterns.
 All repositories for specific models should extend this class.
 """
 
-from typing import Generic, TypeVar, Type, List, Optional
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    TypeVar,
+    Type,
+    List,
+    Optional,
+    Sequence,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import DeclarativeMeta
+from sqlalchemy import insert, select, update, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import DeclarativeMeta, make_transient_to_detached
+from app.utils.read_through_cache import ReadThroughCache
 
 T = TypeVar("T", bound=DeclarativeMeta)
 
@@ -14,30 +26,252 @@ T = TypeVar("T", bound=DeclarativeMeta)
 class BaseRepository(Generic[T]):
     """
     A reusable async repository base class for SQLAlchemy models.
+
+    When a `ReadThroughCache` is given, single-entity lookups are served
+    from it and writes invalidate the affected keys. When a `read_db` session
+    (e.g. bound to a replica) is given, read methods use it; writes always
+    go through `db`.
+
+    Only the columns in `_cached_columns` (all columns if None) are copied
+    into the cache; subclasses leave secrets such as password hashes out.
     """
 
-    def __init__(self, db: AsyncSession, model: Type[T]):
+    _cached_columns: Optional[Sequence[str]] = None
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        model: Type[T],
+        cache: Optional[ReadThroughCache] = None,
+        read_db: Optional[AsyncSession] = None,
+    ):
         self.db = db
+        self.read_db = read_db or db
         self.model = model
+        self.cache = cache
+
+    # === Read-through cache helpers ===
+
+    def _cache_keys(self, instance: T) -> List[str]:
+        """Cache keys that must be dropped when `instance` changes."""
+        return [f"id:{instance.id}"]
+
+    def _to_row(self, instance: Optional[T]) -> Optional[dict]:
+        if instance is None:
+            return None
+        keys = self._cached_columns
+        if keys is None:
+            keys = [attr.key for attr in inspect(self.model).column_attrs]
+        return {key: getattr(instance, key) for key in keys}
+
+    async def _from_row(self, row: Optional[dict]) -> Optional[T]:
+        # Attach a cached row to this session without hitting the DB
+        if row is None:
+            return None
+        instance = self.model(**row)
+        make_transient_to_detached(instance)
+        return await self.read_db.merge(instance, load=False)
+
+    async def _cached(
+        self, key: str, query: Callable[[AsyncSession], Awaitable[Optional[T]]]
+    ) -> Optional[T]:
+        """
+        Run `query(session)` through the read-through cache.
+        """
+        if self.cache is None:
+            return await query(self.read_db)
+
+        async def load() -> Optional[dict]:
+            # The load is shared across requests and may outlive this one,
+            # so it gets its own short-lived session on the same engine
+            async with AsyncSession(self.read_db.bind) as session:
+                return self._to_row(await query(session))
+
+        return await self._from_row(await self.cache.get_or_load(key, load))
+
+    async def _invalidate(self, *instances: T) -> None:
+        if self.cache is not None and instances:
+            keys = [key for instance in instances for key in self._cache_keys(instance)]
+            await self.cache.invalidate(*keys)
+
+    def _insert(self):
+        """Dialect-specific INSERT construct (supports ON CONFLICT)."""
+        dialect = self.db.bind.dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(self.model)
+        if dialect == "sqlite":
+            return sqlite.insert(self.model)
+        raise NotImplementedError(f"ON CONFLICT inserts not supported on {dialect}")
+
+    # === CRUD ===
 
     async def get_all(self) -> List[T]:
         """Fetch all records for the model."""
-        result = await self.db.execute(select(self.model))
+        result = await self.read_db.execute(select(self.model))
+        return result.scalars().all()
+
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        filters: Sequence = (),
+    ) -> List[T]:
+        """
+        Fetch up to `limit` records ordered by primary key (keyset pagination).
+        Only rows with an id strictly greater than `after` are returned, so each
+        page is a single index range scan regardless of how deep the cursor is.
+        """
+        stmt = select(self.model).where(*filters).order_by(self.model.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        result = await self.read_db.execute(stmt)
         return result.scalars().all()
 
+    async def stream_chunks(
+        self,
+        chunk_size: int,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[List[T]]:
+        """
+        Stream records in primary-key order through a server-side cursor,
+        yielding lists of at most `chunk_size` rows.
+        """
+        stmt = select(self.model).order_by(self.model.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        result = await self.read_db.stream_scalars(
+            stmt.execution_options(yield_per=chunk_size)
+        )
+        async for chunk in result.partitions():
+            yield chunk
+
     async def get_by_id(self, id_: int) -> Optional[T]:
-        """Fetch a record by its primary key."""
-        return await self.db.get(self.model, id_)
+        """Fetch a record by its primary key (read-through cached)."""
+        return await self._cached(
+            f"id:{id_}", lambda session: session.get(self.model, id_)
+        )
 
     async def create(self, **kwargs) -> T:
         """Create a new record and commit to DB."""
-        instance = self.model(**kwargs)
-        self.db.add(instance)
+        return await self.insert_returning(**kwargs)
+
+    async def insert_returning(self, **values) -> T:
+        """
+        `INSERT ... RETURNING` in one statement (no separate refresh).
+        Raises IntegrityError on a unique-constraint conflict.
+        """
+        stmt = insert(self.model).values(**values).returning(self.model)
+        instance = (await self.db.scalars(stmt)).one()
+        await self.db.commit()
+        await self._invalidate(instance)
+        return instance
+
+    async def upsert(
+        self,
+        values: dict,
+        index_elements: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> Optional[T]:
+        """
+        `INSERT ... ON CONFLICT DO NOTHING / DO UPDATE ... RETURNING` in one
+        statement.
+
+        Without `update_columns` a conflicting row is left untouched and None
+        is returned, so callers detect duplicates from the database instead of
+        a racy pre-check. With `update_columns` (which requires
+        `index_elements`) those columns are overwritten and the row returned.
+        Omitting `index_elements` with DO NOTHING matches any unique constraint.
+        """
+        stmt = self._insert().values(**values)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={col: stmt.excluded[col] for col in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        instance = (
+            await self.db.scalars(stmt.returning(self.model))
+        ).one_or_none()
         await self.db.commit()
-        await self.db.refresh(instance)
+        if instance is not None:
+            await self._invalidate(instance)
         return instance
 
+    async def update_returning(self, id_: int, **values) -> Optional[T]:
+        """
+        `UPDATE ... WHERE id = :id RETURNING` in one statement.
+        Returns None if no row has that id. Cache keys derived from both the
+        old and the new values are invalidated (e.g. `name:<old>` on rename).
+
+        On PostgreSQL the prior row comes back from the same statement through
+        a self-join (`UPDATE ... FROM users AS old ... RETURNING old.*`).
+        SQLite's RETURNING cannot see FROM tables, so there it is read just
+        before the UPDATE, in the same transaction.
+        """
+        attrs = inspect(self.model).column_attrs
+        columns = [attr.columns[0] for attr in attrs]
+        stmt = update(self.model).where(self.model.id == id_).values(**values)
+        if self.db.bind.dialect.name == "postgresql":
+            old = self.model.__table__.alias("old")
+            stmt = stmt.where(old.c.id == self.model.id).returning(
+                self.model, *(old.c[column.name] for column in columns)
+            )
+            row = (await self.db.execute(stmt)).first()
+            instance, before = (row[0], row[1:]) if row else (None, None)
+        else:
+            before = (
+                await self.db.execute(select(*columns).where(self.model.id == id_))
+            ).first()
+            instance = (await self.db.scalars(stmt.returning(self.model))).one_or_none()
+        await self.db.commit()
+        if instance is not None:
+            stale = [instance]
+            if before is not None:
+                stale.append(self.model(**dict(zip((a.key for a in attrs), before))))
+            await self._invalidate(*stale)
+        return instance
+
+    async def create_many(
+        self, rows: Sequence[dict], match_on: str
+    ) -> List[Optional[T]]:
+        """
+        Insert many records with one multi-row `INSERT ... ON CONFLICT DO NOTHING
+        RETURNING` and a single commit.
+
+        Returns a list aligned with `rows`: the created record, or None where the
+        row hit a unique constraint (in the table or earlier in `rows`).
+        Rows are matched to returned records by the unique column `match_on`.
+        """
+        seen = set()
+        unique_rows = []
+        for row in rows:
+            if row[match_on] not in seen:
+                seen.add(row[match_on])
+                unique_rows.append(row)
+        if not unique_rows:
+            return [None] * len(rows)
+
+        stmt = (
+            self._insert()
+            .values(unique_rows)
+            .on_conflict_do_nothing()
+            .returning(self.model)
+        )
+        created = (await self.db.scalars(stmt)).all()
+        await self.db.commit()
+        await self._invalidate(*created)
+
+        by_key = {getattr(instance, match_on): instance for instance in created}
+        results = []
+        for row in rows:
+            # Only the first occurrence of a duplicated key can own the record
+            results.append(by_key.pop(row[match_on], None))
+        return results
+
     async def delete(self, instance: T) -> None:
         """Delete a record."""
         await self.db.delete(instance)
         await self.db.commit()
+        await self._invalidate(instance)
@@ -2,11 +2,15 @@
 Repository for interacting with the User model.
 """
 
-from typing import Optional, List
+from typing import Optional, List, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models import User
 from app.repositories.base_repository import BaseRepository
+from app.utils.read_through_cache import ReadThroughCache
+
+# Namespace of the read-through cache for single-user lookups
+ENTITY_CACHE_NAMESPACE = "users:entity"
 
 
 class UserRepository(BaseRepository[User]):
@@ -14,15 +18,30 @@ class UserRepository(BaseRepository[User]):
     Repository for CRUD operations on User entities.
     """
 
-    def __init__(self, db: AsyncSession):
-        super().__init__(db, User)
+    # Password hashes stay out of the entity cache
+    _cached_columns = ("id", "name", "email")
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: Optional[ReadThroughCache] = None,
+        read_db: Optional[AsyncSession] = None,
+    ):
+        super().__init__(db, User, cache=cache, read_db=read_db)
+
+    def _cache_keys(self, instance: User) -> List[str]:
+        return super()._cache_keys(instance) + [f"name:{instance.name}"]
 
     async def get_by_name(self, name: str) -> Optional[User]:
         """
-        Fetch a user by their username.
+        Fetch a user by their username (read-through cached).
         """
-        result = await self.db.execute(select(User).where(User.name == name))
-        return result.scalar_one_or_none()
+
+        async def query(session: AsyncSession) -> Optional[User]:
+            result = await session.execute(select(User).where(User.name == name))
+            return result.scalar_one_or_none()
+
+        return await self._cached(f"name:{name}", query)
 
     async def get_all_users(self) -> List[User]:
         """
@@ -31,8 +50,40 @@ class UserRepository(BaseRepository[User]):
         """
         return await super().get_all()
 
-    async def create_user(self, name: str, email: Optional[str] = None) -> User:
+    async def list_users_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        name_prefix: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> List[User]:
+        """
+        Return one keyset page of users, optionally filtered.
+        Both filters are served by the indexes on `name` and `email`.
+        """
+        filters = []
+        if name_prefix:
+            filters.append(User.name.startswith(name_prefix, autoescape=True))
+        if email:
+            filters.append(User.email == email)
+        return await super().get_page(limit, after=after, filters=filters)
+
+    async def create_user(
+        self,
+        name: str,
+        email: Optional[str] = None,
+        hashed_password: Optional[str] = None,
+    ) -> Optional[User]:
+        """
+        Create and persist a new user in one statement.
+        Returns None if the name (or email) is already taken.
+        """
+        return await super().upsert(
+            {"name": name, "email": email, "hashed_password": hashed_password}
+        )
+
+    async def create_users(self, rows: Sequence[dict]) -> List[Optional[User]]:
         """
-        Create and persist a new user.
+        Bulk-insert users; entries are None where the name or email already exists.
         """
-        return await super().create(name=name, email=email)
+        return await super().create_many(rows, match_on="name")
@@ -5,9 +5,9 @@ RQ background job definitions.
 import time
 import random
 import logging
-from rq.job import Job
-from rq.registry import FinishedJobRegistry
-from app.queue_setup import queue, redis_conn
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.queue.cleaner import clean_registries
 
 logger = logging.getLogger("app.tasks")
 
@@ -28,15 +28,16 @@ def process_image(filename: str):
     return f"Processed {filename}"
 
 
-def clean_old_jobs():
+async def clean_old_jobs():
     """
-    Clean finished jobs from Redis registry to keep it lightweight.
+    Clean expired and over-retention jobs from every RQ registry
+    to keep Redis lightweight.
     """
-    registry = FinishedJobRegistry(queue=queue)
-    count = 0
-    for job_id in registry.get_job_ids():
-        job = Job.fetch(job_id, connection=redis_conn)
-        job.delete()
-        count += 1
-    logger.info(f"🧹 Cleaned {count} finished jobs from registry.")
+    redis = Redis.from_url(settings.REDIS_URL)
+    try:
+        cleaned = await clean_registries(redis)
+    finally:
+        await redis.aclose()
+    count = sum(cleaned.values())
+    logger.info(f"🧹 Cleaned {count} jobs from registries.")
     return f"Cleaned {count} jobs"
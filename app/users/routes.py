@@ -2,29 +2,47 @@
 User API endpoints — thin controller layer using the UserService.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import AsyncIterator, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
 from app.utils.logging_utils import log_time
-from app.users.service import UserService
-from app.users.schemas import UserCreate, UserRead
+from app.users.service import UserService, export_users
+from app.users.schemas import BulkCreateResult, UserCreate, UserRead, UserPage
 from app.utils import redis_manager
+from app.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=TimedRoute)
 
 
-@router.get("/", response_model=list[UserRead], summary="List all users")
+@router.get("/", response_model=UserPage, summary="List users (cursor paginated)")
 @log_time
-async def list_users(db: AsyncSession = Depends(get_db)):
+async def list_users(
+    limit: int = Query(
+        settings.USERS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.USERS_PAGE_MAX_LIMIT
+    ),
+    after: Optional[int] = Query(None, description="Return users with id > after"),
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    email: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+):
     """
-    Retrieve all users (cached in Redis).
+    Retrieve one page of users (each page cached in Redis).
+    Pass the returned `next_cursor` as `after` to fetch the next page.
+    The cached JSON body is returned as-is, skipping response-model encoding.
     """
-    if not redis_manager.redis_client:
+    if not redis_manager.redis_bytes_client:
         raise HTTPException(status_code=500, detail="Redis not initialized")
 
-    service = UserService(db, redis_manager.redis_client)
+    service = UserService(db, redis_manager.redis_bytes_client)
     try:
-        return await service.list_users()
+        body = await service.list_users(
+            limit=limit, after=after, name_prefix=name_prefix, email=email
+        )
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -32,11 +50,25 @@ async def list_users(db: AsyncSession = Depends(get_db)):
         )
 
 
+@router.get("/export", summary="Stream all users as NDJSON or CSV")
+async def export_all_users(format: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Stream the whole users table without buffering it in memory.
+    """
+    if format == "csv":
+        return StreamingResponse(
+            export_users("csv"),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="users.csv"'},
+        )
+    return StreamingResponse(export_users("ndjson"), media_type="application/x-ndjson")
+
+
 @router.post("/", response_model=UserRead, summary="Create a new user")
 @log_time
 async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
-    Create a new user and clear cached user list.
+    Create a new user and clear cached user pages.
     """
     if not redis_manager.redis_client:
         raise HTTPException(status_code=500, detail="Redis not initialized")
@@ -44,8 +76,66 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     service = UserService(db, redis_manager.redis_client)
     try:
         return await service.create_user(user)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create user: {e}",
         )
+
+
+async def _iter_records(request: Request) -> AsyncIterator[tuple[int, object]]:
+    """
+    Yield (line number, record) pairs from an NDJSON stream, decoding line by
+    line as chunks arrive, or from a JSON array body.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" not in content_type and "jsonl" not in content_type:
+        body = await request.json()
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+        for line, record in enumerate(body, start=1):
+            yield line, record
+        return
+
+    line = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for raw in complete:
+            line += 1
+            if raw.strip():
+                yield line, raw
+    if buffer.strip():
+        yield line + 1, buffer
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkCreateResult,
+    summary="Bulk-create users from a JSON array or streamed NDJSON",
+)
+@log_time
+async def bulk_create_users(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Create many users in batched multi-row inserts.
+    Send `Content-Type: application/x-ndjson` to stream one user per line;
+    conflicting and invalid rows are reported by line number.
+    """
+    if not redis_manager.redis_client:
+        raise HTTPException(status_code=500, detail="Redis not initialized")
+
+    service = UserService(db, redis_manager.redis_client)
+    try:
+        return await service.bulk_create_users(_iter_records(request))
+    except HTTPException:
+        raise
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Bulk import failed: {e}",
+        )
@@ -2,8 +2,8 @@
 Pydantic schemas for user requests and responses.
 """
 
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, TypeAdapter
+from typing import Optional, List
 
 
 class UserCreate(BaseModel):
@@ -17,3 +17,24 @@ class UserRead(BaseModel):
     email: Optional[EmailStr]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserPage(BaseModel):
+    items: List[UserRead]
+    next_cursor: Optional[int] = None
+
+
+# Validates a whole list of ORM rows in one call (no per-row model overhead)
+UserReadList = TypeAdapter(List[UserRead])
+
+
+class BulkRowIssue(BaseModel):
+    line: int
+    name: Optional[str] = None
+    error: str
+
+
+class BulkCreateResult(BaseModel):
+    created: int
+    conflicts: List[BulkRowIssue]
+    invalid: List[BulkRowIssue]
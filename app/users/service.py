@@ -2,17 +2,49 @@
 Service layer for user management with Redis caching and Prometheus metrics.
 """
 
+import io
+import csv
 import json
 import logging
+from typing import AsyncIterator, Optional
 from prometheus_client import Counter
-from app.repositories.user_repository import UserRepository
-from app.users.schemas import UserCreate, UserRead
+from app.core.config import settings
+from app.core.database import read_session_factory
+from app.utils import cache_invalidation
+from app.utils.local_cache import LocalCache
+from app.utils.read_through_cache import ReadThroughCache
+from app.utils.request_timing import span
+from app.repositories.user_repository import ENTITY_CACHE_NAMESPACE, UserRepository
+from app.users.schemas import (
+    BulkRowIssue,
+    UserCreate,
+    UserPage,
+    UserRead,
+    UserReadList,
+)
 
 logger = logging.getLogger(__name__)
 
 # === Prometheus Metrics ===
 cache_hits = Counter("cache_hits_total", "Number of cache hits")
 cache_misses = Counter("cache_misses_total", "Number of cache misses")
+l1_cache_hits = Counter("cache_l1_hits_total", "Number of in-process cache hits")
+l1_cache_misses = Counter("cache_l1_misses_total", "Number of in-process cache misses")
+l1_cache_evictions = Counter(
+    "cache_l1_evictions_total", "Number of in-process cache LRU evictions"
+)
+
+# Redis set tracking every cached page key, so writes can drop them all at once
+PAGE_INDEX_KEY = "users:pages"
+CACHE_NAMESPACE = "users"
+
+# === L1 (per-process) cache in front of Redis ===
+local_cache = LocalCache(
+    maxsize=settings.USERS_L1_MAXSIZE,
+    ttl=settings.USERS_L1_TTL,
+    on_evict=l1_cache_evictions.inc,
+)
+cache_invalidation.on_invalidate(CACHE_NAMESPACE, local_cache.clear)
 
 
 class UserService:
@@ -22,35 +54,190 @@ class UserService:
     """
 
     def __init__(self, db, redis):
-        self.repo = UserRepository(db)
+        self.repo = UserRepository(
+            db, cache=ReadThroughCache(redis, ENTITY_CACHE_NAMESPACE)
+        )
         self.redis = redis
 
-    async def list_users(self) -> list[UserRead]:
+    @staticmethod
+    def _page_cache_key(
+        limit: int,
+        after: Optional[int],
+        name_prefix: Optional[str],
+        email: Optional[str],
+    ) -> str:
+        return "users:page:" + json.dumps([limit, after, name_prefix, email])
+
+    async def list_users(
+        self,
+        limit: int = settings.USERS_PAGE_DEFAULT_LIMIT,
+        after: Optional[int] = None,
+        name_prefix: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> bytes:
         """
-        Retrieve all users, using Redis cache when available.
+        Retrieve one page of users as ready-to-send JSON bytes, from the
+        in-process cache, then Redis, then the database.
+        Cached payloads are the final response body and are never re-parsed.
         """
-        cache_key = "users"
+        cache_key = self._page_cache_key(limit, after, name_prefix, email)
+        data = local_cache.get(cache_key)
+        if data is not None:
+            l1_cache_hits.inc()
+            return data
+        l1_cache_misses.inc()
+        # An invalidation landing during the awaits below must not be undone
+        generation = local_cache.generation
+
         cached_data = await self.redis.get(cache_key)
 
         if cached_data:
             cache_hits.inc()
-            logger.debug("Cache hit for 'users'")
-            return json.loads(cached_data)
+            logger.debug("Cache hit for %s", cache_key)
+            if local_cache.generation == generation:
+                local_cache.set(cache_key, cached_data)
+            return cached_data
 
         cache_misses.inc()
-        logger.debug("Cache miss for 'users', fetching from DB")
-        users = await self.repo.get_all_users()
-        data = [UserRead.from_orm(u).dict() for u in users]
+        logger.debug("Cache miss for %s, fetching from DB", cache_key)
+        # Fetch one extra row to learn whether another page exists
+        users = await self.repo.list_users_page(
+            limit + 1, after=after, name_prefix=name_prefix, email=email
+        )
+        with span("serialize"):
+            items = UserReadList.validate_python(users[:limit], from_attributes=True)
+            next_cursor = items[-1].id if len(users) > limit else None
+            data = UserPage.model_construct(
+                items=items, next_cursor=next_cursor
+            ).model_dump_json().encode()
 
-        # Cache for 60 seconds
-        await self.redis.set(cache_key, json.dumps(data), ex=60)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(cache_key, data, ex=settings.USERS_CACHE_TTL)
+            pipe.sadd(PAGE_INDEX_KEY, cache_key)
+            pipe.expire(PAGE_INDEX_KEY, settings.USERS_CACHE_TTL)
+            await pipe.execute()
+        if local_cache.generation == generation:
+            local_cache.set(cache_key, data)
         return data
 
+    async def invalidate_cache(self) -> None:
+        """
+        Drop every cached user page from Redis and from every worker's L1.
+        """
+        keys = await self.redis.smembers(PAGE_INDEX_KEY)
+        await self.redis.delete(PAGE_INDEX_KEY, *keys)
+        await cache_invalidation.publish(self.redis, CACHE_NAMESPACE)
+
     async def create_user(self, user_data: UserCreate) -> UserRead:
         """
         Create a new user and invalidate cache.
+        Raises ValueError if the name or email is already taken.
         """
-        logger.info(f"Creating user '{user_data.name}'")
+        logger.info("Creating user '%s'", user_data.name)
         user = await self.repo.create_user(name=user_data.name, email=user_data.email)
-        await self.redis.delete("users")
+        if user is None:
+            raise ValueError("User name or email already exists")
+        await self.invalidate_cache()
         return UserRead.from_orm(user)
+
+    async def bulk_create_users(self, records: AsyncIterator[tuple[int, object]]) -> dict:
+        """
+        Insert users from a stream of (line number, record) pairs in batches,
+        reporting conflicts and invalid rows per line. A record is either a
+        decoded JSON object or the raw bytes of one JSON document.
+        The cache is invalidated once, after all batches.
+        """
+        created = 0
+        conflicts: list[BulkRowIssue] = []
+        invalid: list[BulkRowIssue] = []
+        batch: list[tuple[int, UserCreate]] = []
+
+        async def flush() -> int:
+            rows = [{"name": u.name, "email": u.email} for _, u in batch]
+            results = await self.repo.create_users(rows)
+            for (line, user), record in zip(batch, results):
+                if record is None:
+                    conflicts.append(
+                        BulkRowIssue(line=line, name=user.name, error="already exists")
+                    )
+            batch.clear()
+            return sum(record is not None for record in results)
+
+        try:
+            async for line, raw in records:
+                try:
+                    if isinstance(raw, (bytes, str)):
+                        raw = json.loads(raw)
+                    batch.append((line, UserCreate.model_validate(raw)))
+                except ValueError as e:  # bad JSON or pydantic ValidationError
+                    name = raw.get("name") if isinstance(raw, dict) else None
+                    # Only echo names that fit the report schema (e.g. not 123)
+                    name = name if isinstance(name, str) else None
+                    invalid.append(BulkRowIssue(line=line, name=name, error=str(e)))
+                    continue
+                if len(batch) >= settings.USERS_BULK_BATCH_SIZE:
+                    created += await flush()
+            if batch:
+                created += await flush()
+        finally:
+            if created:
+                await self.invalidate_cache()
+
+        logger.info(
+            "Bulk import: %d created, %d conflicts, %d invalid",
+            created,
+            len(conflicts),
+            len(invalid),
+        )
+        return {"created": created, "conflicts": conflicts, "invalid": invalid}
+
+
+EXPORT_FIELDS = ("id", "name", "email")
+
+
+def _encode_chunk(users, fmt: str) -> bytes:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows((u.id, u.name, u.email or "") for u in users)
+        return buffer.getvalue().encode()
+    return "".join(
+        json.dumps({"id": u.id, "name": u.name, "email": u.email}) + "\n"
+        for u in users
+    ).encode()
+
+
+async def export_users(fmt: str = "ndjson") -> AsyncIterator[bytes]:
+    """
+    Stream every user as NDJSON or CSV with flat memory use.
+
+    Rows are read through a server-side cursor in USERS_EXPORT_CHUNK_SIZE
+    chunks. Each session covers at most USERS_EXPORT_SEGMENT_SIZE rows and is
+    closed before that segment is sent, so a slow client never holds a pooled
+    connection; the next segment resumes from the last id (keyset), possibly
+    on another read replica.
+    """
+    if fmt == "csv":
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_FIELDS)
+        yield header.getvalue().encode()
+
+    after = None
+    while True:
+        segment: list[bytes] = []
+        rows = 0
+        async with read_session_factory()() as session:
+            repo = UserRepository(session)
+            async for chunk in repo.stream_chunks(
+                settings.USERS_EXPORT_CHUNK_SIZE,
+                after=after,
+                limit=settings.USERS_EXPORT_SEGMENT_SIZE,
+            ):
+                segment.append(_encode_chunk(chunk, fmt))
+                rows += len(chunk)
+                after = chunk[-1].id
+
+        for data in segment:
+            yield data
+        if rows < settings.USERS_EXPORT_SEGMENT_SIZE:
+            return
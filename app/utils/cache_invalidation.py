@@ -0,0 +1,87 @@
+"""
+Cross-process cache invalidation over Redis pub/sub.
+
+Every worker subscribes to one channel; publishing a namespace makes all
+workers (on all nodes) run the local callbacks registered for it.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable
+from redis.asyncio import Redis
+
+logger = logging.getLogger("app.utils.cache_invalidation")
+
+CHANNEL = "cache:invalidate"
+
+_callbacks: dict[str, list[Callable[[], None]]] = defaultdict(list)
+_listener_task: asyncio.Task | None = None
+
+
+def on_invalidate(namespace: str, callback: Callable[[], None]) -> None:
+    """
+    Register a local callback run whenever `namespace` is invalidated.
+    """
+    _callbacks[namespace].append(callback)
+
+
+def _run_callbacks(namespace: str) -> None:
+    for callback in _callbacks.get(namespace, ()):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Invalidation callback for '{namespace}' failed: {e}")
+
+
+async def publish(redis: Redis, namespace: str) -> None:
+    """
+    Invalidate `namespace` locally right away, then broadcast to every worker.
+    """
+    _run_callbacks(namespace)
+    await redis.publish(CHANNEL, namespace)
+
+
+async def _listen(redis: Redis, retry_delay: float) -> None:
+    while True:
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CHANNEL)
+            async for message in pubsub.listen():
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode()
+                _run_callbacks(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Invalidation listener lost connection: {e}")
+            # Anything published while disconnected was missed, so drop it all
+            for namespace in list(_callbacks):
+                _run_callbacks(namespace)
+            await asyncio.sleep(retry_delay)
+        finally:
+            await pubsub.aclose()
+
+
+async def start_listener(redis: Redis, retry_delay: float = 1.0) -> None:
+    """
+    Start the background pub/sub listener (idempotent).
+    """
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen(redis, retry_delay))
+
+
+async def stop_listener() -> None:
+    """
+    Cancel the background listener and wait for it to exit.
+    """
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
@@ -0,0 +1,66 @@
+"""
+In-process LRU cache with TTL, used as an L1 tier in front of Redis.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Size-bounded LRU cache whose entries also expire after `ttl` seconds.
+
+    Not thread-safe: it is meant to be used from a single event loop,
+    where no await happens between a lookup and the matching update.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 5.0,
+        on_evict: Optional[Callable[[], None]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        # Bumped by clear(): callers that await between reading the source and
+        # calling set() compare it to skip values made stale in the meantime
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing or expired."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            if self.on_evict:
+                self.on_evict()
+
+    def pop(self, key: Hashable) -> None:
+        """Remove a single entry if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
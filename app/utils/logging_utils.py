@@ -1,20 +1,311 @@
 """
-Logging utilities for consistent performance tracking.
+Logging utilities: non-blocking structured logging and performance tracking.
+
+`setup_logging()` routes every record through a QueueHandler: the calling
+thread (usually the event loop) only filters the record, renders its
+message and enqueues it. A QueueListener thread does the JSON (or text)
+formatting, traceback rendering and the write to stderr.
+
+On the way in, records are tagged with the current request ID (set by
+`RequestIdMiddleware`), DEBUG/INFO records are sampled per logger
+(LOG_SAMPLING) and every level is capped per logger (LOG_RATE_LIMITS).
+Records dropped by sampling, caps or a full queue are counted in
+`log_records_dropped_total`.
 """
 
+import re
+import sys
+import json
 import time
+import uuid
+import queue
+import atexit
+import random
 import logging
 import inspect
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+from typing import Mapping, Optional
+from prometheus_client import Counter
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
 
-# Configure global logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger("app.utils.logging")
 
+# === Prometheus Metrics ===
+log_records_dropped = Counter(
+    "log_records_dropped_total", "Log records not written", ["reason"]
+)
+_dropped_sampled = log_records_dropped.labels(reason="sampled")
+_dropped_rate_limited = log_records_dropped.labels(reason="rate_limited")
+_dropped_queue_full = log_records_dropped.labels(reason="queue_full")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, logger, msg, request_id, `extra=`
+    fields and the formatted exception, if any.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class _Rule:
+    __slots__ = ("sample", "rate", "tokens", "updated")
+
+    def __init__(self, sample: float, rate: Optional[int]):
+        self.sample = sample
+        self.rate = rate
+        self.tokens = float(rate or 0)
+        self.updated = time.monotonic()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-logger sampling and rate caps, matched on the longest configured
+    logger-name prefix (`"app.users"` covers `"app.users.service"`).
+
+    - `sampling`: fraction of DEBUG/INFO records kept; WARNING and above
+      are never sampled out.
+    - `rate_limits`: records per second allowed through, any level,
+      with bursts up to one second's worth.
+    """
+
+    def __init__(
+        self,
+        sampling: Mapping[str, float],
+        rate_limits: Mapping[str, int],
+    ):
+        super().__init__()
+        self._prefixes = {
+            name: _Rule(sampling.get(name, 1.0), rate_limits.get(name))
+            for name in set(sampling) | set(rate_limits)
+        }
+        self._rules: dict[str, Optional[_Rule]] = {}
+        self._lock = threading.Lock()
+
+    def _rule_for(self, name: str) -> Optional[_Rule]:
+        try:
+            return self._rules[name]
+        except KeyError:
+            pass
+        match = None
+        for prefix in self._prefixes:
+            if name == prefix or name.startswith(prefix + "."):
+                if match is None or len(prefix) > len(match):
+                    match = prefix
+        rule = self._rules[name] = self._prefixes.get(match)
+        return rule
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Runs in the calling thread, while the request is still current
+        record.request_id = request_id_var.get()
+
+        rule = self._rule_for(record.name)
+        if rule is None:
+            return True
+        if (
+            rule.sample < 1.0
+            and record.levelno < logging.WARNING
+            and random.random() >= rule.sample
+        ):
+            _dropped_sampled.inc()
+            return False
+        if rule.rate is not None:
+            with self._lock:
+                now = time.monotonic()
+                rule.tokens = min(
+                    rule.rate, rule.tokens + (now - rule.updated) * rule.rate
+                )
+                rule.updated = now
+                if rule.tokens < 1:
+                    _dropped_rate_limited.inc()
+                    return False
+                rule.tokens -= 1
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread and drops
+    records, instead of blocking or erroring, once `maxsize` are waiting.
+    """
+
+    def __init__(self, records: queue.SimpleQueue, maxsize: int):
+        super().__init__(records)
+        self.maxsize = maxsize
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message now, since args may change after the call;
+        # exc_info stays as is and is formatted by the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue is unbounded but much cheaper to put to than Queue
+        if self.queue.qsize() >= self.maxsize:
+            _dropped_queue_full.inc()
+            return
+        self.queue.put_nowait(record)
+
+
+_listener: Optional[QueueListener] = None
+# Loggers uvicorn gives their own synchronous handlers
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    stream=None,
+    sampling: Optional[Mapping[str, float]] = None,
+    rate_limits: Optional[Mapping[str, int]] = None,
+) -> QueueListener:
+    """
+    Replace the root logger's handlers with the queued pipeline and start
+    its writer thread. Safe to call more than once.
+    `sampling` and `rate_limits` default to LOG_SAMPLING / LOG_RATE_LIMITS.
+    """
+    global _listener
+    if fmt not in ("json", "text"):
+        raise ValueError(f"Unknown LOG_FORMAT: {fmt}")
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = NonBlockingQueueHandler(records, settings.LOG_QUEUE_SIZE)
+    handler.addFilter(
+        SamplingFilter(
+            settings.LOG_SAMPLING if sampling is None else sampling,
+            settings.LOG_RATE_LIMITS if rate_limits is None else rate_limits,
+        )
+    )
+
+    # Record fields neither formatter prints; skipping them makes records cheaper
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+        old.close()
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """
+    Flush queued records and stop the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+# === Request IDs ===
+
+_REQUEST_ID_RE = re.compile(r"^[\w.\-:]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware binding a request ID to every log record of the
+    request. A well-formed incoming `X-Request-ID` is reused, otherwise a
+    new one is generated; either way it is echoed in the response.
+    """
+
+    header = "x-request-id"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_RE.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+
+
+# === Timing ===
+
 
 def log_time(func):
     """
@@ -28,7 +319,12 @@ def log_time(func):
             start = time.perf_counter()
             result = await func(*args, **kwargs)
             elapsed = (time.perf_counter() - start) * 1000
-            logger.info(f"[ASYNC] {func.__name__} took {elapsed:.2f} ms")
+            logger.info(
+                "[ASYNC] %s took %.2f ms",
+                func.__name__,
+                elapsed,
+                extra={"duration_ms": round(elapsed, 3)},
+            )
             return result
 
     else:
@@ -38,7 +334,12 @@ def log_time(func):
             start = time.perf_counter()
             result = func(*args, **kwargs)
             elapsed = (time.perf_counter() - start) * 1000
-            logger.info(f"[SYNC] {func.__name__} took {elapsed:.2f} ms")
+            logger.info(
+                "[SYNC] %s took %.2f ms",
+                func.__name__,
+                elapsed,
+                extra={"duration_ms": round(elapsed, 3)},
+            )
             return result
 
     return wrapper
@@ -0,0 +1,164 @@
+"""
+Cached, label-preserving JSON view of the Prometheus registry.
+
+Collecting the registry walks every metric (and runs custom collectors
+such as the queue stats one, which reads Redis), so the parsed result is
+kept for `ttl` seconds and refreshed in a worker thread, one refresh at a
+time. Histogram percentiles are computed from the buckets the same way as
+PromQL's `histogram_quantile`.
+"""
+
+import asyncio
+import math
+import time
+from typing import Iterable, Optional, Sequence
+from prometheus_client import REGISTRY
+from prometheus_client.registry import CollectorRegistry
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def _finite(value: float) -> Optional[float]:
+    # JSON has no NaN/Inf
+    return value if math.isfinite(value) else None
+
+
+def histogram_quantile(
+    q: float, buckets: Sequence[tuple[float, float]]
+) -> Optional[float]:
+    """
+    Estimate the q-quantile from cumulative `(upper_bound, count)` buckets
+    sorted by bound, interpolating linearly inside the matching bucket.
+    """
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = q * buckets[-1][1]
+    lower, below = 0.0, 0.0
+    for upper, count in buckets:
+        if count >= rank:
+            if math.isinf(upper):
+                # Nothing to interpolate towards; report the last finite bound
+                return lower
+            if count == below:
+                return upper
+            return lower + (upper - lower) * (rank - below) / (count - below)
+        lower, below = upper, count
+    return lower
+
+
+def _parse_family(family) -> dict:
+    kind = family.type
+    series: dict[tuple, dict] = {}
+
+    def entry(labels: dict) -> dict:
+        key = tuple(sorted(labels.items()))
+        if key not in series:
+            series[key] = {"labels": dict(labels)}
+        return series[key]
+
+    for sample in family.samples:
+        suffix = sample.name[len(family.name) :]
+        if suffix == "_created":
+            continue
+        labels = sample.labels
+        if kind == "histogram":
+            labels = {k: v for k, v in labels.items() if k != "le"}
+            item = entry(labels)
+            if suffix == "_bucket":
+                item.setdefault("buckets", []).append(
+                    (float(sample.labels["le"]), sample.value)
+                )
+            else:
+                item[suffix.lstrip("_")] = sample.value
+        elif kind == "summary":
+            labels = {k: v for k, v in labels.items() if k != "quantile"}
+            item = entry(labels)
+            if "quantile" in sample.labels:
+                item.setdefault("quantiles", {})[sample.labels["quantile"]] = _finite(
+                    sample.value
+                )
+            else:
+                item[suffix.lstrip("_")] = sample.value
+        elif kind in ("counter", "gauge"):
+            entry(labels)["value"] = _finite(sample.value)
+        else:
+            entry({**labels, "__name__": sample.name})["value"] = _finite(sample.value)
+
+    parsed = list(series.values())
+    for item in parsed:
+        if "buckets" in item:
+            item["buckets"].sort()
+    return {"type": kind, "help": family.documentation, "series": parsed}
+
+
+class MetricsSnapshot:
+    """
+    Parsed copy of a registry, re-collected at most once per `ttl` seconds.
+    """
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY, ttl: float = 2.0):
+        self.registry = registry
+        self.ttl = ttl
+        self._metrics: dict[str, dict] = {}
+        self._taken_at = 0.0
+        self._expires = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _collect(self) -> dict[str, dict]:
+        return {f.name: _parse_family(f) for f in self.registry.collect()}
+
+    async def get(self) -> tuple[float, dict[str, dict]]:
+        """
+        Return `(taken_at, metrics)`, refreshing in a thread when stale.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if time.monotonic() >= self._expires:
+            async with self._lock:
+                if time.monotonic() >= self._expires:
+                    self._metrics = await asyncio.to_thread(self._collect)
+                    self._taken_at = time.time()
+                    self._expires = time.monotonic() + self.ttl
+        return self._taken_at, self._metrics
+
+
+def render(
+    metrics: dict[str, dict],
+    names: Optional[Iterable[str]] = None,
+    prefix: Optional[str] = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    buckets: bool = False,
+) -> dict[str, dict]:
+    """
+    Filter a snapshot by family name (or `<name>_total`) and prefix, and
+    replace histogram buckets with the requested percentiles.
+    """
+    wanted = None
+    if names:
+        wanted = {n.removesuffix("_total") for n in names} | set(names)
+
+    out = {}
+    for name, family in metrics.items():
+        if wanted is not None and name not in wanted:
+            continue
+        if prefix and not name.startswith(prefix):
+            continue
+        if family["type"] != "histogram":
+            out[name] = family
+            continue
+
+        series = []
+        for item in family["series"]:
+            rendered = {k: v for k, v in item.items() if k != "buckets"}
+            bucket_list = item.get("buckets", [])
+            rendered["percentiles"] = {
+                f"p{q * 100:g}": histogram_quantile(q, bucket_list) for q in quantiles
+            }
+            if buckets:
+                rendered["buckets"] = {
+                    ("+Inf" if math.isinf(le) else f"{le:g}"): count
+                    for le, count in bucket_list
+                }
+            series.append(rendered)
+        out[name] = {**family, "series": series}
+    return out
@@ -1,48 +1,90 @@
 """
-Middleware that profiles request execution using cProfile.
-Activated only when PROFILE=1.
+Pure ASGI profiling middleware. Activated only when PROFILE=1; otherwise it
+is a plain passthrough.
+
+- PROFILE_MODE=sample: every request is attributed to the stack sampler,
+  which aggregates event-loop stacks per route in memory
+  (served by GET /system/profile).
+- PROFILE_MODE=cprofile: a PROFILE_REQUEST_RATE fraction of requests is
+  profiled with cProfile and saved as .prof files, keeping only the newest
+  PROFILE_MAX_FILES.
 """
 
-import os
 import time
+import random
 import cProfile
 from pathlib import Path
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.utils.stack_sampler import sampler
 
 logger = logging.getLogger("app.utils.profiler")
 
 
-class RequestProfilerMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, dump_dir: str = "/app/profiles"):
-        super().__init__(app)
+class RequestProfilerMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        dump_dir: str = settings.PROFILE_DIR,
+        enabled: bool | None = None,
+        mode: str = settings.PROFILE_MODE,
+    ):
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Unknown PROFILE_MODE: {mode}")
+        self.app = app
+        # Read once at startup instead of on every request
+        self.enabled = settings.PROFILE == 1 if enabled is None else enabled
+        self.mode = mode
+        self.rate = settings.PROFILE_REQUEST_RATE
+        self.max_files = settings.PROFILE_MAX_FILES
         self.dump_dir = Path(dump_dir)
-        self.dump_dir.mkdir(parents=True, exist_ok=True)
+        if self.enabled and mode == "cprofile":
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.mode == "sample":
+            task = sampler.track(scope)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                sampler.untrack(task)
+            return
 
-    async def dispatch(self, request: Request, call_next):
+        if random.random() >= self.rate:
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
-        Profiles a request if PROFILE=1 is set in the environment.
-        Saves the profiling report in .prof files under /app/profiles.
+        Profiles an HTTP request and saves the report as a .prof file
+        under the dump directory.
         """
-        if os.getenv("PROFILE", "0") != "1":
-            return await call_next(request)
-
         profiler = cProfile.Profile()
         start = time.perf_counter()
         profiler.enable()
 
         try:
-            response: Response = await call_next(request)
+            await self.app(scope, receive, send)
         finally:
             profiler.disable()
 
         elapsed_ms = (time.perf_counter() - start) * 1000
-        path = request.url.path.strip("/").replace("/", "_") or "root"
-        fname = f"{request.method}_{path}_{int(elapsed_ms)}ms.prof"
+        path = scope["path"].strip("/").replace("/", "_") or "root"
+        stamp = int(time.time() * 1000)
+        fname = f"{scope['method']}_{path}_{stamp}_{int(elapsed_ms)}ms.prof"
         fpath = self.dump_dir / fname
         profiler.dump_stats(str(fpath))
+        self._enforce_retention()
 
         logger.info(f"Profile saved: {fpath} ({elapsed_ms:.2f} ms)")
-        return response
+
+    def _enforce_retention(self) -> None:
+        files = sorted(self.dump_dir.glob("*.prof"), key=lambda f: f.stat().st_mtime)
+        for old in files[: max(len(files) - self.max_files, 0)]:
+            old.unlink(missing_ok=True)
@@ -1,45 +1,362 @@
 """
-Simple Redis-based rate limiter middleware for FastAPI.
+Redis-based rate limiter middleware for FastAPI.
+
+Each request costs exactly one Redis round trip: the whole check-and-update
+runs atomically inside a Lua script (loaded once, then called via EVALSHA).
+Two algorithms are available:
+
+- ``sliding_window``: exact sliding-window log kept in a sorted set.
+- ``token_bucket``: bucket of ``limit`` tokens refilled over ``window`` seconds.
+
+With ``RATE_LIMIT_MODE=local`` each worker instead counts requests in memory
+and syncs its deltas to Redis in pipelined batches every
+``RATE_LIMIT_SYNC_INTERVAL`` seconds (sliding-window-counter approximation).
+Requests never wait on Redis; the price is a bounded overshoot of roughly
+``workers x requests per sync interval``.
 """
 
+import math
 import time
+import asyncio
 import logging
-from fastapi import Request, HTTPException
+import secrets
+from dataclasses import dataclass
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from prometheus_client import Counter, Histogram
 from redis.asyncio import Redis
+from app.auth.dependencies import verify_token
 from app.core.config import settings
+from app.queue.metrics import rate_limited
+from app.utils.request_timing import TimedRedis
 
 logger = logging.getLogger("app.utils.rate_limiter")
 
-# Configurable parameters (can be moved to env)
-MAX_REQUESTS = 100
-WINDOW_SIZE = 60  # seconds
+# === Prometheus Metrics (local mode) ===
+rate_limit_overshoot = Counter(
+    "rate_limit_overshoot_total",
+    "Requests admitted beyond the limit because of delayed local sync",
+)
+rate_limit_flush_latency = Histogram(
+    "rate_limit_flush_seconds",
+    "Latency of one batched rate-limit sync to Redis",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
 
 # Use Redis DB 1 for rate limiting
-redis_client = Redis.from_url(f"{settings.REDIS_URL}/1", decode_responses=True)
+redis_client = TimedRedis.from_url(f"{settings.REDIS_URL}/1", decode_responses=True)
+
+# KEYS[1] = bucket key; ARGV = limit, window_ms, unique member
+# Returns {allowed, remaining, reset_ms}
+_SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, now .. '-' .. ARGV[3])
+    count = count + 1
+    allowed = 1
+end
+redis.call('PEXPIRE', KEYS[1], window)
+
+local reset = window
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window - now
+end
+return {allowed, math.max(limit - count, 0), reset}
+"""
+
+# KEYS[1] = bucket key; ARGV = capacity, window_ms (time to refill fully)
+# Returns {allowed, remaining, reset_ms}
+_TOKEN_BUCKET_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local rate = capacity / window
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+
+local allowed = 0
+local reset
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+    reset = math.ceil((capacity - tokens) / rate)
+else
+    reset = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window)
+return {allowed, math.floor(tokens), reset}
+"""
+
+_scripts = {
+    "sliding_window": redis_client.register_script(_SLIDING_WINDOW_LUA),
+    "token_bucket": redis_client.register_script(_TOKEN_BUCKET_LUA),
+}
+if settings.RATE_LIMIT_MODE not in ("redis", "local"):
+    raise ValueError(f"Unknown RATE_LIMIT_MODE: {settings.RATE_LIMIT_MODE}")
+if settings.RATE_LIMIT_ALGORITHM not in _scripts:
+    raise ValueError(f"Unknown RATE_LIMIT_ALGORITHM: {settings.RATE_LIMIT_ALGORITHM}")
+_script = _scripts[settings.RATE_LIMIT_ALGORITHM]
+
+# Longest prefix first so the most specific route limit wins
+_route_limits = sorted(
+    settings.RATE_LIMIT_ROUTES.items(), key=lambda item: len(item[0]), reverse=True
+)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_ms: int
+
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_ms / 1000)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = headers["X-RateLimit-Reset"]
+        return headers
+
+    def raw_headers(self) -> list[tuple[bytes, bytes]]:
+        return [(k.lower().encode(), v.encode()) for k, v in self.headers().items()]
+
+
+def _identify(scope: Scope) -> tuple[str, bool]:
+    """
+    Return the client identity and whether it is an authenticated user.
+    Bearer tokens go through the cached verifier, so this is usually free.
+    """
+    auth = Headers(scope=scope).get("authorization", "")
+    if auth[:7].lower() == "bearer ":
+        claims = verify_token(auth[7:])
+        if claims:
+            return f"user:{claims['sub']}", True
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}", False
+
+
+def _resolve_limit(path: str, is_user: bool) -> tuple[str, int]:
+    for prefix, limit in _route_limits:
+        if path.startswith(prefix):
+            return prefix, limit
+    if is_user:
+        return "default", settings.RATE_LIMIT_USER_MAX_REQUESTS
+    return "default", settings.RATE_LIMIT_MAX_REQUESTS
+
+
+async def check_rate_limit(identity: str, scope: str, limit: int) -> RateLimitResult:
+    """
+    Consume one request from `identity`'s budget for `scope` (one round trip).
+    """
+    window_ms = settings.RATE_LIMIT_WINDOW * 1000
+    key = f"rate:{settings.RATE_LIMIT_ALGORITHM}:{scope}:{identity}"
+    args = [limit, window_ms]
+    if settings.RATE_LIMIT_ALGORITHM == "sliding_window":
+        args.append(secrets.token_hex(4))
+    allowed, remaining, reset_ms = await _script(keys=[key], args=args)
+    return RateLimitResult(bool(allowed), limit, int(remaining), int(reset_ms))
+
+
+class LocalRateLimiter:
+    """
+    Per-worker pre-aggregating limiter.
+
+    Admission uses `global count (as of last sync) + local unsynced delta`,
+    with the previous window weighted by how much of it still overlaps the
+    sliding window. A background task pushes deltas with INCRBY and reads
+    back the global totals, all in one pipeline per interval.
+    """
+
+    def __init__(self, redis: Redis, window: int, interval: float):
+        self.redis = redis
+        self.window = window
+        self.interval = interval
+        self._pending: dict[str, int] = {}  # redis key -> unsynced local hits
+        self._global: dict[str, int] = {}  # redis key -> last synced total
+        self._seen: set[str] = set()  # keys touched since the last sync
+        self._limits: dict[str, int] = {}  # redis key -> limit it is checked against
+        self._task: asyncio.Task | None = None
+
+    def _key(self, scope: str, identity: str, window_idx: int) -> str:
+        return f"rate:local:{scope}:{identity}:{window_idx}"
+
+    def hit(self, identity: str, scope: str, limit: int) -> RateLimitResult:
+        """
+        Consume one request locally without touching Redis.
+        """
+        now = time.time()
+        idx = int(now // self.window)
+        elapsed = now - idx * self.window
+        curr = self._key(scope, identity, idx)
+        prev = self._key(scope, identity, idx - 1)
+
+        weight = 1 - elapsed / self.window
+        count = (
+            self._global.get(curr, 0)
+            + self._pending.get(curr, 0)
+            + self._global.get(prev, 0) * weight
+        )
+        self._seen.add(curr)
+        self._seen.add(prev)
+        self._limits[curr] = limit
+
+        allowed = count < limit
+        if allowed:
+            self._pending[curr] = self._pending.get(curr, 0) + 1
+            count += 1
+        reset_ms = int((self.window - elapsed) * 1000)
+        return RateLimitResult(allowed, limit, max(int(limit - count), 0), reset_ms)
+
+    async def flush(self) -> None:
+        """
+        Push local deltas and refresh global counts in one pipelined batch.
+        """
+        pending, self._pending = self._pending, {}
+        seen, self._seen = self._seen, set()
+        reads = [k for k in seen if k not in pending]
+        if not pending and not reads:
+            return
+
+        with rate_limit_flush_latency.time():
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key, delta in pending.items():
+                        pipe.incrby(key, delta)
+                        pipe.expire(key, self.window * 2)
+                    for key in reads:
+                        pipe.get(key)
+                    results = await pipe.execute()
+            except Exception:
+                # Keep the deltas for the next attempt
+                for key, delta in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + delta
+                raise
+
+        for i, (key, delta) in enumerate(pending.items()):
+            total = int(results[i * 2])
+            self._global[key] = total
+            limit = self._limits.get(key)
+            if limit is not None:
+                before = total - delta
+                rate_limit_overshoot.inc(max(0, total - max(before, limit)))
+        for key, value in zip(reads, results[len(pending) * 2 :]):
+            self._global[key] = int(value or 0)
+
+        # Forget windows that can no longer affect admission
+        oldest = int(time.time() // self.window) - 1
+        for state in (self._global, self._limits):
+            for key in [k for k in state if int(k.rsplit(":", 1)[1]) < oldest]:
+                del state[key]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Rate limiter sync failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"⚠️ Final rate limiter sync failed: {e}")
 
 
-async def rate_limiter(request: Request, call_next):
+local_limiter = LocalRateLimiter(
+    redis_client, settings.RATE_LIMIT_WINDOW, settings.RATE_LIMIT_SYNC_INTERVAL
+)
+
+
+async def start_rate_limiter() -> None:
+    """
+    Start background syncing when running in local mode.
+    """
+    if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_MODE == "local":
+        local_limiter.start()
+
+
+async def stop_rate_limiter() -> None:
+    """
+    Flush outstanding local counts and stop syncing.
     """
-    Rate-limit incoming requests based on client IP and fixed window.
+    if settings.RATE_LIMIT_MODE == "local":
+        await local_limiter.stop()
+
+
+class RateLimitMiddleware:
     """
-    ip = request.client.host
-    window = int(time.time() // WINDOW_SIZE)
-    key = f"rate:{ip}:{window}"
+    Pure ASGI middleware rate-limiting requests per user (bearer token) or
+    client IP. Fails open if Redis is unavailable.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.local = settings.RATE_LIMIT_MODE == "local"
 
-    try:
-        async with redis_client.pipeline() as pipe:
-            pipe.incr(key)
-            pipe.expire(key, WINDOW_SIZE + 5)
-            count, _ = await pipe.execute()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        if count > MAX_REQUESTS:
-            logger.warning(f"Rate limit exceeded for IP: {ip}")
-            raise HTTPException(
+        identity, is_user = _identify(scope)
+        scope_name, limit = _resolve_limit(scope["path"], is_user)
+
+        try:
+            if self.local:
+                result = local_limiter.hit(identity, scope_name, limit)
+            else:
+                result = await check_rate_limit(identity, scope_name, limit)
+        except Exception as e:
+            logger.error(f"Rate limiter failed: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if not result.allowed:
+            rate_limited.inc()
+            logger.warning("Rate limit exceeded for %s on %s", identity, scope_name)
+            response = JSONResponse(
                 status_code=429,
-                detail="Too many requests. Please try again later.",
+                content={"detail": "Too many requests. Please try again later."},
+                headers=result.headers(),
             )
+            await response(scope, receive, send)
+            return
+
+        extra_headers = result.raw_headers()
 
-    except Exception as e:
-        logger.error(f"Rate limiter failed: {e}")
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *extra_headers]
+            await send(message)
 
-    return await call_next(request)
+        await self.app(scope, receive, send_with_headers)
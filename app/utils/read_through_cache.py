@@ -0,0 +1,151 @@
+"""
+Stampede-proof read-through cache backed by Redis.
+
+- Concurrent misses for the same key inside one process share a single load
+  (single-flight); across processes/nodes a short Redis lock elects one loader.
+- Hot keys are refreshed early with probability rising towards expiry
+  (XFetch), so popular entries rarely expire for everyone at once.
+- Absent values are cached for a shorter TTL (negative caching).
+"""
+
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import secrets
+from typing import Any, Awaitable, Callable, Optional
+from prometheus_client import Counter
+from redis.asyncio import Redis
+from app.core.config import settings
+
+logger = logging.getLogger("app.utils.read_through_cache")
+
+entity_cache_lookups = Counter(
+    "entity_cache_lookups_total",
+    "Read-through cache lookups by outcome",
+    ["namespace", "result"],
+)
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# key -> in-flight load shared by every coroutine in this process
+_inflight: dict[str, asyncio.Task] = {}
+
+
+class ReadThroughCache:
+    """
+    Caches JSON-serializable values (or None) produced by async loaders.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        namespace: str,
+        ttl: int = settings.ENTITY_CACHE_TTL,
+        negative_ttl: int = settings.ENTITY_CACHE_NEGATIVE_TTL,
+        lock_timeout: float = settings.ENTITY_CACHE_LOCK_TIMEOUT,
+        beta: float = settings.ENTITY_CACHE_BETA,
+    ):
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock_timeout = lock_timeout
+        self.beta = beta
+        self._release_lock = redis.register_script(_RELEASE_LOCK_LUA)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _count(self, result: str) -> None:
+        entity_cache_lookups.labels(namespace=self.namespace, result=result).inc()
+
+    async def _read(self, rkey: str) -> Optional[dict]:
+        raw = await self.redis.get(rkey)
+        return json.loads(raw) if raw else None
+
+    def _should_refresh_early(self, entry: dict) -> bool:
+        # XFetch: recompute before expiry with probability growing as it nears
+        delta = entry["d"] * self.beta * -math.log(1.0 - random.random())
+        return time.time() + delta >= entry["x"]
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Return the cached value for `key`, calling `loader` at most once per
+        process (and usually once cluster-wide) when it is missing or stale.
+
+        The load is shared with other callers and may outlive the one that
+        started it, so `loader` must not use that caller's resources (e.g.
+        its DB session); open short-lived ones instead.
+        """
+        rkey = self._key(key)
+        entry = await self._read(rkey)
+        if entry is not None and not self._should_refresh_early(entry):
+            self._count("hit" if entry["v"] is not None else "negative_hit")
+            return entry["v"]
+
+        task = _inflight.get(rkey)
+        if task is not None:
+            self._count("coalesced")
+            return await asyncio.shield(task)
+
+        self._count("miss" if entry is None else "early_refresh")
+        task = asyncio.ensure_future(self._load(rkey, loader, entry))
+        _inflight[rkey] = task
+        task.add_done_callback(lambda _: _inflight.pop(rkey, None))
+        # Shielded: cancelling this caller must not fail the coalesced ones
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, rkey: str, loader: Callable[[], Awaitable[Any]], stale: Optional[dict]
+    ) -> Any:
+        lock_key = f"lock:{rkey}"
+        token = secrets.token_hex(8)
+        acquired = await self.redis.set(
+            lock_key, token, nx=True, px=int(self.lock_timeout * 1000)
+        )
+
+        if not acquired:
+            # Another node is loading: serve stale data if we have it,
+            # otherwise wait for its result before falling back to the DB.
+            if stale is not None:
+                return stale["v"]
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                entry = await self._read(rkey)
+                if entry is not None:
+                    return entry["v"]
+            logger.warning(f"Timed out waiting for cache fill of {rkey}")
+
+        try:
+            start = time.perf_counter()
+            value = await loader()
+            delta = time.perf_counter() - start
+            await self._write(rkey, value, delta)
+            return value
+        finally:
+            if acquired:
+                await self._release_lock(keys=[lock_key], args=[token])
+
+    async def _write(self, rkey: str, value: Any, delta: float = 0.0) -> None:
+        ttl = self.ttl if value is not None else self.negative_ttl
+        entry = {"v": value, "d": delta, "x": time.time() + ttl}
+        await self.redis.set(rkey, json.dumps(entry), ex=ttl)
+
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Remove cached entries (including negative ones) for the given keys.
+        """
+        if keys:
+            await self.redis.delete(*(self._key(k) for k in keys))
@@ -6,22 +6,28 @@ import asyncio
 import logging
 from redis.asyncio import Redis
 from app.core.config import settings
+from app.utils.request_timing import TimedRedis
 
 logger = logging.getLogger("app.utils.redis")
 
 redis_client: Redis | None = None
+# Same server, but returns raw bytes: used to serve pre-serialized payloads
+redis_bytes_client: Redis | None = None
 
 
 async def init_redis(retries: int = 10, delay: float = 2.0):
     """
     Initialize the global Redis client with retry logic.
     """
-    global redis_client
+    global redis_client, redis_bytes_client
     for attempt in range(1, retries + 1):
         try:
-            client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+            client = TimedRedis.from_url(settings.REDIS_URL, decode_responses=True)
             await client.ping()
             redis_client = client
+            redis_bytes_client = TimedRedis.from_url(
+                settings.REDIS_URL, decode_responses=False
+            )
             logger.info(f"✅ Redis connected (attempt {attempt})")
             return
         except Exception as e:
@@ -34,7 +40,10 @@ async def close_redis():
     """
     Gracefully close the Redis connection on shutdown.
     """
-    global redis_client
+    global redis_client, redis_bytes_client
+    if redis_bytes_client:
+        await redis_bytes_client.aclose()
+        redis_bytes_client = None
     if redis_client:
         await redis_client.aclose()
         logger.info("🧹 Redis connection closed.")
@@ -0,0 +1,322 @@
+"""
+Per-request stage timing.
+
+Each request gets a `RequestTimings` in a context variable, so any code
+running for it (including SQLAlchemy's greenlets and threadpool endpoints)
+can add to it without passing anything around:
+
+    with span("render"):
+        ...
+
+Recorded automatically:
+- `db`: SQLAlchemy statements on engines passed to `instrument_engine`
+- `redis`: commands and pipelines of `TimedRedis` clients
+- `parse` / `handler` / `serialize`: request validation and dependencies,
+  the endpoint itself, and response-model validation plus JSON encoding,
+  on routers created with `route_class=TimedRoute`
+
+`RequestTimingMiddleware` sends the totals as a `Server-Timing` header and
+observes `http_stage_duration_seconds{method,route,stage}`. Stages nest and
+may overlap (`db` time is also part of `handler`), and concurrent calls add
+up, so stages are not expected to sum to the request time.
+
+Outside a request every hook is a single context-variable lookup.
+"""
+
+import inspect
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Optional
+from fastapi.routing import APIRoute
+from prometheus_client import Histogram
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+# === Prometheus Metrics ===
+_STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 0.5, 1)
+stage_latency = Histogram(
+    "http_stage_duration_seconds",
+    "Time spent per request stage",
+    ["method", "route", "stage"],
+    buckets=_STAGE_BUCKETS,
+)
+# (method, route, stage) -> histogram child; skips labels()'s lock and checks
+_stage_children: dict[tuple[str, str, str], Histogram] = {}
+
+
+def _observe(method: str, route: str, stage: str, seconds: float) -> None:
+    key = (method, route, stage)
+    child = _stage_children.get(key)
+    if child is None:
+        child = _stage_children[key] = stage_latency.labels(method, route, stage)
+    child.observe(seconds)
+
+
+class RequestTimings:
+    """
+    Accumulated seconds and call count per stage for one request.
+    """
+
+    __slots__ = ("start", "stages", "endpoint")
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.stages: dict[str, list] = {}  # stage -> [seconds, calls]
+        # (called, returned) perf_counter pair, set by TimedRoute
+        self.endpoint: Optional[tuple[float, float]] = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def server_timing(self) -> str:
+        """
+        `Server-Timing` header value, durations in milliseconds.
+        """
+        parts = [
+            f'{stage};desc="{calls}";dur={seconds * 1000:.2f}'
+            for stage, (seconds, calls) in self.stages.items()
+        ]
+        parts.append(f"total;dur={(perf_counter() - self.start) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """
+    Timings of the request being handled, or None outside a request.
+    """
+    return _timings.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    """
+    Add `seconds` to `stage` of the current request (no-op outside one).
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+class span:
+    """
+    Context manager timing its body as `stage` of the current request.
+    Works around `await`s; lower-case like contextlib's managers.
+    """
+
+    __slots__ = ("stage", "_timings", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "span":
+        self._timings = _timings.get()
+        if self._timings is not None:
+            self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._timings is not None:
+            self._timings.add(self.stage, perf_counter() - self._start)
+
+
+# === SQLAlchemy ===
+
+
+def _before_cursor_execute(conn, cursor, statement, params, context, executemany):
+    if _timings.get() is not None:
+        context._timing_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, params, context, executemany):
+    start = getattr(context, "_timing_start", None)
+    if start is not None:
+        record("db", perf_counter() - start)
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    context = exception_context.execution_context
+    start = getattr(context, "_timing_start", None)
+    if start is not None:
+        record("db", perf_counter() - start)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record every statement run on `engine` as the `db` stage.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+# === Redis ===
+
+
+class TimedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        timings = _timings.get()
+        if timings is None:
+            return await super().execute(raise_on_error)
+        start = perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            timings.add("redis", perf_counter() - start)
+
+
+class TimedRedis(Redis):
+    """
+    Async Redis client recording each command and pipeline as `redis`.
+    """
+
+    async def execute_command(self, *args, **options):
+        timings = _timings.get()
+        if timings is None:
+            return await super().execute_command(*args, **options)
+        start = perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            timings.add("redis", perf_counter() - start)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: Optional[str] = None
+    ) -> TimedPipeline:
+        return TimedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# === FastAPI routes ===
+
+
+def _timed_endpoint(call: Callable) -> Callable:
+    if inspect.iscoroutinefunction(call):
+
+        @wraps(call)
+        async def endpoint(*args, **kwargs):
+            timings = _timings.get()
+            called = perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.endpoint = (called, perf_counter())
+
+    else:
+        # Runs in the threadpool, which inherits the request's context
+
+        @wraps(call)
+        def endpoint(*args, **kwargs):
+            timings = _timings.get()
+            called = perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.endpoint = (called, perf_counter())
+
+    return endpoint
+
+
+class TimedRoute(APIRoute):
+    """
+    Route splitting its handling into `parse`, `handler` and `serialize`.
+    Use as `APIRouter(route_class=TimedRoute)`.
+    """
+
+    def get_route_handler(self):
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = _timings.get()
+            if timings is None:
+                return await handler(request)
+            start = perf_counter()
+            try:
+                response = await handler(request)
+            except BaseException:
+                _record_route(timings, start, None)
+                raise
+            _record_route(timings, start, perf_counter())
+            return response
+
+        return timed_handler
+
+
+def _record_route(
+    timings: RequestTimings, start: float, finished: Optional[float]
+) -> None:
+    if timings.endpoint is None:
+        # Rejected before the endpoint ran (validation or a dependency)
+        timings.add("parse", (finished or perf_counter()) - start)
+        return
+    called, returned = timings.endpoint
+    timings.add("parse", called - start)
+    timings.add("handler", returned - called)
+    if finished is not None:
+        timings.add("serialize", finished - returned)
+
+
+# === Middleware ===
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestTimingMiddleware:
+    """
+    Pure ASGI middleware collecting stage timings for each HTTP request.
+    Add it last so it wraps the other middleware (rate limiting uses Redis).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        enabled: bool | None = None,
+        header: bool | None = None,
+    ):
+        self.app = app
+        self.enabled = settings.REQUEST_TIMING if enabled is None else enabled
+        self.header = settings.SERVER_TIMING_HEADER if header is None else header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header if self.header else send)
+        finally:
+            _timings.reset(token)
+            method, route = scope["method"], _route_label(scope)
+            for stage, (seconds, _) in timings.stages.items():
+                _observe(method, route, stage, seconds)
@@ -0,0 +1,178 @@
+"""
+Low-overhead statistical profiler for the event loop.
+
+A daemon thread periodically snapshots the event-loop thread's Python stack
+and attributes it to the request whose asyncio task is running at that
+moment. When the request finishes (and its route is known) its samples are
+folded into that route's totals.
+Stacks are aggregated in memory as collapsed stacks ("a;b;c" -> count), the
+input format of flamegraph.pl, speedscope and d3-flame-graph.
+"""
+
+import sys
+import asyncio
+import threading
+from collections import Counter, defaultdict
+from typing import Optional
+from app.core.config import settings
+
+MAX_DEPTH = 128
+# Bucket for samples beyond a route's distinct-stack budget
+TRUNCATED = "[truncated]"
+
+
+class StackSampler:
+    """
+    Samples the stack of one event-loop thread every `interval` seconds.
+    """
+
+    def __init__(self, interval: float = 0.01, max_stacks_per_route: int = 5000):
+        self.interval = interval
+        self.max_stacks_per_route = max_stacks_per_route
+        self._stacks: dict[str, Counter] = defaultdict(Counter)
+        # task -> (ASGI scope, stacks sampled so far for that request)
+        self._tasks: dict[asyncio.Task, tuple[dict, list]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # === Called from the event loop ===
+
+    def track(self, scope: dict) -> Optional[asyncio.Task]:
+        """
+        Attribute samples taken while the current task runs to `scope`'s route.
+        Starts the sampler thread on first use.
+        """
+        task = asyncio.current_task()
+        if task is None:
+            return None
+        if self._thread is None:
+            self.start(asyncio.get_running_loop())
+        self._tasks[task] = (scope, [])
+        return task
+
+    def untrack(self, task: Optional[asyncio.Task]) -> None:
+        """
+        Stop sampling the request and fold its samples into its route.
+        """
+        entry = self._tasks.pop(task, None) if task is not None else None
+        if not entry or not entry[1]:
+            return
+        scope, stacks = entry
+        label = self._route_label(scope)
+        with self._lock:
+            counts = self._stacks[label]
+            for stack in stacks:
+                if stack in counts or len(counts) < self.max_stacks_per_route:
+                    counts[stack] += 1
+                else:
+                    counts[TRUNCATED] += 1
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # === Sampler thread ===
+
+    @staticmethod
+    def _route_label(scope: dict) -> str:
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return f"{scope.get('method', '')} {route.path}".strip()
+        return "unmatched"
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _sample(self) -> None:
+        task = asyncio.current_task(self._loop)
+        entry = self._tasks.get(task) if task is not None else None
+        if entry is None:
+            return  # loop idle or running something other than a request
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is not None:
+            entry[1].append(self._collapse(frame))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                # Racing a mutating loop is expected; just skip this tick
+                pass
+
+    # === Reporting ===
+
+    def routes(self) -> dict[str, int]:
+        with self._lock:
+            return {route: sum(c.values()) for route, c in self._stacks.items()}
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """
+        Collapsed-stack text (`route;frame;frame count` per line).
+        """
+        lines = []
+        with self._lock:
+            for label, counts in self._stacks.items():
+                if route is not None and label != route:
+                    continue
+                for stack, count in counts.items():
+                    lines.append(f"{label};{stack} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def tree(self, route: Optional[str] = None) -> dict:
+        """
+        Nested {name, value, children} tree, as consumed by d3-flame-graph.
+        """
+        root = {"name": "root", "value": 0, "children": {}}
+        with self._lock:
+            items = [
+                (label, stack, count)
+                for label, counts in self._stacks.items()
+                if route is None or label == route
+                for stack, count in counts.items()
+            ]
+        for label, stack, count in items:
+            node = root
+            node["value"] += count
+            for name in [label, *stack.split(";")]:
+                node = node["children"].setdefault(
+                    name, {"name": name, "value": 0, "children": {}}
+                )
+                node["value"] += count
+
+        def finish(node: dict) -> dict:
+            node["children"] = [finish(child) for child in node["children"].values()]
+            return node
+
+        return finish(root)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+
+
+sampler = StackSampler(
+    interval=settings.PROFILE_SAMPLE_INTERVAL,
+    max_stacks_per_route=settings.PROFILE_MAX_STACKS,
+)
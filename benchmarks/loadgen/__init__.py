@@ -0,0 +1,6 @@
+"""
+Async load generator: scenario files, open/closed-loop runs, traffic
+recording and replay, and JSON reports compared against a baseline.
+
+Run `python -m benchmarks.loadgen --help`.
+"""
@@ -0,0 +1,206 @@
+"""
+Async load generator for the API.
+
+Usage:
+    # closed loop: 20 virtual users for 30s after a 5s warm-up
+    python -m benchmarks.loadgen run benchmarks/scenarios/users.json \\
+        --concurrency 20 --duration 30 --warmup 5 --report users.json
+
+    # open loop: 200 flows/s (Poisson arrivals) over several scenarios
+    python -m benchmarks.loadgen run benchmarks/scenarios/*.json \\
+        --rate 200 --poisson --record benchmarks/results/requests.jsonl
+
+    # resend recorded traffic at its original pace, or flat out
+    python -m benchmarks.loadgen replay benchmarks/results/requests.jsonl
+    python -m benchmarks.loadgen replay benchmarks/results/requests.jsonl --speed 0
+
+    # fail (exit 1) if a report regressed against a saved baseline
+    python -m benchmarks.loadgen compare users.json baseline/users.json
+
+`run` and `replay` take --baseline too, comparing right after the run.
+"""
+
+import sys
+import asyncio
+import argparse
+from contextlib import nullcontext
+from pathlib import Path
+from benchmarks.loadgen.report import (
+    build_report,
+    compare,
+    load_report,
+    print_report,
+    save_report,
+)
+from benchmarks.loadgen.runner import LoadRunner
+from benchmarks.loadgen.scenarios import Scenario, read_recording
+
+
+def _headers(values: list[str]) -> dict[str, str]:
+    headers = {}
+    for value in values:
+        name, _, content = value.partition(":")
+        headers[name.strip()] = content.strip()
+    return headers
+
+
+def _finish(report: dict, args) -> int:
+    print_report(report)
+    if args.report:
+        save_report(report, args.report)
+        print(f"report written to {args.report}")
+    if args.baseline:
+        return _compare(report, load_report(args.baseline), args)
+    return 0
+
+
+def _compare(report: dict, baseline: dict, args) -> int:
+    regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+    for line in regressions:
+        print(f"❌ {line}")
+    if not regressions:
+        print(f"✅ No regression beyond {args.threshold:g}% against the baseline")
+    return 1 if regressions else 0
+
+
+def cmd_run(args) -> int:
+    scenario = Scenario.combine([Scenario.load(path) for path in args.scenarios])
+    mode = "open" if args.rate else "closed"
+    record = nullcontext()
+    if args.record:
+        Path(args.record).parent.mkdir(parents=True, exist_ok=True)
+        record = open(args.record, "w")
+    with record as record_file:
+        runner = LoadRunner(
+            args.base_url,
+            scenario,
+            timeout=args.timeout,
+            headers=_headers(args.header),
+            record=record_file,
+            seed=args.seed,
+        )
+        if mode == "open":
+            coro = runner.open_loop(
+                args.rate,
+                args.duration,
+                warmup=args.warmup,
+                poisson=args.poisson,
+                max_in_flight=args.max_in_flight,
+            )
+        else:
+            coro = runner.closed_loop(
+                args.concurrency, args.duration, warmup=args.warmup, think=args.think
+            )
+        asyncio.run(coro)
+
+    config = {
+        "scenario": scenario.name,
+        "mode": mode,
+        "base_url": args.base_url,
+        "duration": args.duration,
+        "warmup": args.warmup,
+    }
+    if mode == "open":
+        config.update(
+            rate=args.rate,
+            arrivals="poisson" if args.poisson else "constant",
+            max_in_flight=args.max_in_flight,
+        )
+    else:
+        config.update(concurrency=args.concurrency, think=args.think)
+    return _finish(build_report(runner, config), args)
+
+
+def cmd_replay(args) -> int:
+    entries = sorted(read_recording(args.recording), key=lambda e: e["t"])
+    runner = LoadRunner(
+        args.base_url, timeout=args.timeout, headers=_headers(args.header)
+    )
+    asyncio.run(
+        runner.replay(
+            entries,
+            speed=args.speed,
+            concurrency=args.concurrency,
+            max_in_flight=args.max_in_flight,
+        )
+    )
+    config = {
+        "scenario": f"replay:{args.recording}",
+        "mode": "open" if args.speed else "closed",
+        "base_url": args.base_url,
+        "speed": args.speed,
+    }
+    if not args.speed:
+        config["concurrency"] = args.concurrency
+    return _finish(build_report(runner, config), args)
+
+
+def cmd_compare(args) -> int:
+    return _compare(load_report(args.report), load_report(args.baseline), args)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadgen",
+        description=__doc__.splitlines()[1],
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--base-url", default="http://127.0.0.1:8000")
+        sub.add_argument("--timeout", type=float, default=10.0)
+        sub.add_argument(
+            "--header", action="append", default=[], help='"Name: value"'
+        )
+        sub.add_argument("--concurrency", type=int, default=10)
+        sub.add_argument("--max-in-flight", type=int, default=1000)
+        sub.add_argument("--report", help="Write the JSON report here")
+        sub.add_argument("--baseline", help="Compare against this report")
+
+    def add_thresholds(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument(
+            "--threshold", type=float, default=10.0, help="Allowed growth in %%"
+        )
+        sub.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=1.0,
+            help="Ignore latency changes smaller than this",
+        )
+
+    run = commands.add_parser("run", help="Generate load from scenario files")
+    run.add_argument("scenarios", nargs="+")
+    run.add_argument(
+        "--rate", type=float, help="Open loop: flows started per second"
+    )
+    run.add_argument("--poisson", action="store_true", help="Poisson arrivals")
+    run.add_argument("--duration", type=float, default=30.0)
+    run.add_argument("--warmup", type=float, default=5.0)
+    run.add_argument("--think", type=float, default=0.0, help="Closed-loop pause")
+    run.add_argument("--record", help="Write sent requests as JSON Lines")
+    run.add_argument("--seed", type=int)
+    add_common(run)
+    add_thresholds(run)
+    run.set_defaults(handler=cmd_run)
+
+    replay = commands.add_parser("replay", help="Resend recorded requests")
+    replay.add_argument("recording")
+    replay.add_argument(
+        "--speed", type=float, default=1.0, help="Pace multiplier; 0 = flat out"
+    )
+    add_common(replay)
+    add_thresholds(replay)
+    replay.set_defaults(handler=cmd_replay)
+
+    diff = commands.add_parser("compare", help="Compare a report to a baseline")
+    diff.add_argument("report")
+    diff.add_argument("baseline")
+    add_thresholds(diff)
+    diff.set_defaults(handler=cmd_compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+HDR-style latency histogram.
+
+Values (integer microseconds) are stored in log-linear buckets: each power
+of two is split into `2 ** (precision_bits - 1)` equal sub-buckets, so any
+recorded value is reproduced within 2 ** -(precision_bits - 1) of itself
+(0.1% with the default 11 bits) whatever its magnitude, in a small sparse
+dict. Percentiles report the highest value equivalent to the bucket, as
+HdrHistogram does, and histograms from several workers or runs can be
+merged losslessly.
+"""
+
+from typing import Iterable, Optional
+
+
+class LatencyHistogram:
+    def __init__(self, precision_bits: int = 11):
+        self.precision_bits = precision_bits
+        self.counts: dict[int, int] = {}
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+        self._sum = 0
+
+    def _index(self, value: int) -> int:
+        shift = max(value.bit_length() - self.precision_bits, 0)
+        # Sub-bucket `value >> shift` within magnitude `shift`
+        return (shift << self.precision_bits) | (value >> shift)
+
+    def _highest_equivalent(self, index: int) -> int:
+        shift = index >> self.precision_bits
+        sub = index & ((1 << self.precision_bits) - 1)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_us: float, count: int = 1) -> None:
+        value = max(int(value_us), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self._sum += value * count
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Cannot merge histograms of different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self._sum += other._sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def value_at(self, percentile: float) -> int:
+        """
+        Smallest recorded value (bucket upper bound) that `percentile`% of
+        samples are at or below.
+        """
+        if not self.total:
+            return 0
+        rank = max(1, round(percentile / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self._sum / self.total if self.total else 0.0
+
+    def summary_ms(
+        self, percentiles: Iterable[float] = (50, 90, 95, 99, 99.9)
+    ) -> dict[str, float]:
+        """
+        min / mean / pNN / max in milliseconds (p99.9 is reported as p999).
+        """
+        out = {"min": (self.min or 0) / 1000, "mean": round(self.mean() / 1000, 3)}
+        for p in percentiles:
+            key = "p" + f"{p:g}".replace(".", "")
+            out[key] = self.value_at(p) / 1000
+        out["max"] = self.max / 1000
+        return out
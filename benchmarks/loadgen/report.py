@@ -0,0 +1,150 @@
+"""
+JSON run reports and baseline comparison.
+
+A report holds, per step and overall: request count, errors, status codes,
+throughput and latency (min, mean, p50, p90, p95, p99, p999, max in ms).
+`compare` flags a regression when p50, p95, p99 or p999 grows by more than
+`threshold` percent (and by at least `min_delta_ms`), when the error rate
+grows by more than one percentage point, or when closed-loop throughput
+drops by more than `threshold` percent.
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+from benchmarks.loadgen.histogram import LatencyHistogram
+from benchmarks.loadgen.runner import LoadRunner, StepStats
+
+COMPARED_PERCENTILES = ("p50", "p95", "p99", "p999")
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _step_summary(stats: StepStats, seconds: float) -> dict:
+    count = stats.latency.total
+    return {
+        "count": count,
+        "errors": stats.errors,
+        "error_rate": round(stats.errors / count, 6) if count else 0.0,
+        "throughput_rps": round(count / seconds, 2) if seconds else 0.0,
+        "statuses": dict(sorted(stats.statuses.items())),
+        "latency_ms": stats.latency.summary_ms(),
+    }
+
+
+def build_report(runner: LoadRunner, config: dict[str, Any]) -> dict:
+    seconds = runner.measured_seconds
+    overall = StepStats(latency=LatencyHistogram())
+    for stats in runner.stats.values():
+        overall.latency.merge(stats.latency)
+        overall.errors += stats.errors
+        overall.statuses.update(stats.statuses)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            **config,
+            "measured_seconds": round(seconds, 3),
+        },
+        "overall": {
+            **_step_summary(overall, seconds),
+            "skipped": runner.skipped,
+            "dropped": runner.dropped,
+        },
+        "steps": {
+            name: _step_summary(stats, seconds)
+            for name, stats in sorted(runner.stats.items())
+        },
+    }
+
+
+def save_report(report: dict, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load_report(path: str | Path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(
+        f"{meta.get('scenario', 'replay')} | {meta['mode']} | "
+        f"{meta['measured_seconds']:.1f}s measured"
+    )
+    header = f"{'step':<28} {'count':>7} {'err%':>6} {'rps':>8}"
+    for p in ("p50", "p95", "p99", "p999", "max"):
+        header += f" {p + ' ms':>9}"
+    print(header)
+    rows = list(report["steps"].items()) + [("overall", report["overall"])]
+    for name, step in rows:
+        latency = step["latency_ms"]
+        line = (
+            f"{name[:28]:<28} {step['count']:>7} {step['error_rate'] * 100:>6.2f} "
+            f"{step['throughput_rps']:>8.1f}"
+        )
+        for p in ("p50", "p95", "p99", "p999", "max"):
+            line += f" {latency[p]:>9.2f}"
+        print(line)
+    overall = report["overall"]
+    if overall["dropped"] or overall["skipped"]:
+        print(
+            f"dropped arrivals: {overall['dropped']}, "
+            f"skipped steps: {overall['skipped']}"
+        )
+
+
+def compare(
+    report: dict,
+    baseline: dict,
+    threshold: float = 10.0,
+    min_delta_ms: float = 1.0,
+) -> list[str]:
+    """
+    Regressions of `report` against `baseline`, as readable lines
+    (empty if none). Steps missing from either side are ignored.
+    """
+    regressions = []
+    closed_loop = report["meta"].get("mode") == "closed"
+    rows = [("overall", report["overall"], baseline["overall"])]
+    rows += [
+        (name, step, baseline["steps"][name])
+        for name, step in report["steps"].items()
+        if name in baseline["steps"]
+    ]
+    for name, current, before in rows:
+        for p in COMPARED_PERCENTILES:
+            new, old = current["latency_ms"][p], before["latency_ms"][p]
+            if new - old >= min_delta_ms and new > old * (1 + threshold / 100):
+                regressions.append(
+                    f"{name}: {p} {old:.2f} -> {new:.2f} ms "
+                    f"(+{(new / old - 1) * 100 if old else float('inf'):.0f}%)"
+                )
+        if current["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(
+                f"{name}: error rate {before['error_rate']:.2%} -> "
+                f"{current['error_rate']:.2%}"
+            )
+        old_rps, new_rps = before["throughput_rps"], current["throughput_rps"]
+        if closed_loop and old_rps and new_rps < old_rps * (1 - threshold / 100):
+            regressions.append(
+                f"{name}: throughput {old_rps:.1f} -> {new_rps:.1f} req/s"
+            )
+    return regressions
@@ -0,0 +1,300 @@
+"""
+Open- and closed-loop load generation over one shared httpx.AsyncClient.
+
+- Closed loop: `concurrency` virtual users each run flows back to back, so
+  the offered load drops when the server slows down.
+- Open loop: flows start at a fixed arrival rate (evenly spaced or Poisson)
+  whatever the server does. Latency is measured from each flow's scheduled
+  start, so time spent waiting behind a slow server is not hidden
+  (no coordinated omission). Arrivals beyond `max_in_flight` are counted as
+  dropped instead of piling up.
+"""
+
+import json
+import time
+import random
+import asyncio
+import itertools
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, TextIO
+import httpx
+from benchmarks.loadgen.histogram import LatencyHistogram
+from benchmarks.loadgen.scenarios import (
+    Flow,
+    MissingVariable,
+    Scenario,
+    Step,
+    extract,
+    recorded_step,
+    render,
+)
+
+
+@dataclass
+class StepStats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+
+class LoadRunner:
+    def __init__(
+        self,
+        base_url: str,
+        scenario: Optional[Scenario] = None,
+        timeout: float = 10.0,
+        headers: Optional[dict[str, str]] = None,
+        record: Optional[TextIO] = None,
+        seed: Optional[int] = None,
+    ):
+        self.base_url = base_url
+        self.scenario = scenario
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.record = record
+        self.random = random.Random(seed)
+        self.variables: dict[str, Any] = {"run": f"{int(time.time()):x}"}
+        self.stats: dict[str, StepStats] = {}
+        self.skipped = 0
+        self.dropped = 0
+        self.measuring = False
+        self.measured_seconds = 0.0
+        self._window_start = 0.0
+        self._seq = itertools.count()
+        self._started = time.perf_counter()
+
+    # === Requests ===
+
+    def _client(self, connections: int) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=connections, max_keepalive_connections=connections
+        )
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=limits,
+            headers=self.headers,
+        )
+
+    def _observe(self, name: str, seconds: float, status: Optional[int], ok: bool):
+        if not self.measuring:
+            return
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StepStats()
+        stats.latency.record(seconds * 1e6)
+        stats.statuses[str(status) if status is not None else "error"] += 1
+        if not ok:
+            stats.errors += 1
+
+    def _write_record(self, step: Step, request: dict, status, seconds, setup):
+        entry = {
+            "t": round(time.perf_counter() - self._started, 6),
+            "name": step.name,
+            **request,
+            "auth": step.auth,
+            "status": status,
+            "latency_ms": round(seconds * 1000, 3),
+        }
+        if setup:
+            entry["setup"] = True
+            entry["capture"] = step.capture
+        self.record.write(json.dumps(entry) + "\n")
+
+    async def send(
+        self,
+        client: httpx.AsyncClient,
+        step: Step,
+        variables: dict[str, Any],
+        since: Optional[float] = None,
+        setup: bool = False,
+    ) -> bool:
+        """
+        Send one step; returns False if the flow should stop here.
+        Latency is measured from `since` (the scheduled start) when given.
+        """
+        try:
+            request = {
+                "method": step.method,
+                "path": render(step.path, variables),
+                "params": render(step.params, variables),
+                "json": render(step.json, variables),
+                "form": render(step.form, variables),
+            }
+            headers = None
+            if step.auth:
+                headers = {"Authorization": f"Bearer {render('{token}', variables)}"}
+        except MissingVariable:
+            self.skipped += 1
+            return False
+
+        start = time.perf_counter()
+        status = None
+        try:
+            response = await client.request(
+                request["method"],
+                request["path"],
+                params=request["params"] or None,
+                json=request["json"],
+                data=request["form"],
+                headers=headers,
+            )
+            status = response.status_code
+        except httpx.HTTPError:
+            response = None
+        seconds = time.perf_counter() - (since if since is not None else start)
+        ok = status is not None and step.ok(status)
+        self._observe(step.name, seconds, status, ok)
+        if self.record is not None:
+            self._write_record(step, request, status, seconds, setup)
+
+        if not ok:
+            return False
+        if step.capture:
+            try:
+                body = response.json()
+                for var, path in step.capture.items():
+                    variables[var] = extract(body, path)
+            except (ValueError, KeyError, IndexError, TypeError):
+                return False
+        return True
+
+    async def run_flow(
+        self, client: httpx.AsyncClient, flow: Flow, since: Optional[float] = None
+    ) -> None:
+        variables = {**self.variables, "seq": next(self._seq)}
+        for step in flow.steps:
+            if not await self.send(client, step, variables, since):
+                return
+            since = None
+
+    def _pick_flow(self) -> Flow:
+        flows = self.scenario.flows
+        return self.random.choices(flows, weights=[f.weight for f in flows])[0]
+
+    async def run_setup(
+        self, client: httpx.AsyncClient, steps: Iterable[Step]
+    ) -> None:
+        for step in steps:
+            if not await self.send(client, step, self.variables, setup=True):
+                raise RuntimeError(f"Setup step {step.name!r} failed")
+
+    # === Load shapes ===
+
+    async def _measure(self, warmup: float, duration: float) -> None:
+        await asyncio.sleep(warmup)
+        self.measuring = True
+        self._window_start = time.perf_counter()
+        await asyncio.sleep(duration)
+
+    async def _stop_measuring(self, window: asyncio.Task) -> None:
+        # Flows still in flight when the window closed are recorded too, so
+        # throughput is computed up to the moment the last one finished
+        await window
+        self.measuring = False
+        self.measured_seconds = time.perf_counter() - self._window_start
+
+    async def closed_loop(
+        self, concurrency: int, duration: float, warmup: float = 0.0, think: float = 0.0
+    ) -> None:
+        async with self._client(concurrency) as client:
+            await self.run_setup(client, self.scenario.setup)
+            end = time.perf_counter() + warmup + duration
+
+            async def user() -> None:
+                while time.perf_counter() < end:
+                    await self.run_flow(client, self._pick_flow())
+                    if think:
+                        await asyncio.sleep(think)
+
+            window = asyncio.create_task(self._measure(warmup, duration))
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+            await self._stop_measuring(window)
+
+    async def _open(
+        self,
+        client: httpx.AsyncClient,
+        arrivals: Iterable[tuple[float, Any]],
+        start_flow,
+        max_in_flight: int,
+    ) -> None:
+        tasks: set[asyncio.Task] = set()
+        start = time.perf_counter()
+        for offset, item in arrivals:
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= max_in_flight:
+                if self.measuring:
+                    self.dropped += 1
+                continue
+            task = asyncio.create_task(start_flow(client, item, scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def open_loop(
+        self,
+        rate: float,
+        duration: float,
+        warmup: float = 0.0,
+        poisson: bool = False,
+        max_in_flight: int = 1000,
+    ) -> None:
+        def arrivals():
+            offset = 0.0
+            while offset < warmup + duration:
+                yield offset, self._pick_flow()
+                offset += self.random.expovariate(rate) if poisson else 1 / rate
+
+        async with self._client(max_in_flight) as client:
+            await self.run_setup(client, self.scenario.setup)
+            window = asyncio.create_task(self._measure(warmup, duration))
+            await self._open(client, arrivals(), self.run_flow, max_in_flight)
+            await self._stop_measuring(window)
+
+    async def replay(
+        self,
+        entries: list[dict],
+        speed: float = 1.0,
+        concurrency: int = 10,
+        max_in_flight: int = 1000,
+    ) -> None:
+        """
+        Resend recorded requests: at their recorded offsets divided by
+        `speed`, or, with speed 0, as fast as `concurrency` workers can.
+        Recorded setup requests (e.g. login) run first and are not timed.
+        """
+        setup = [e for e in entries if e.get("setup")]
+        traffic = [e for e in entries if not e.get("setup")]
+        setup_steps = []
+        for entry in setup:
+            step = recorded_step(entry)
+            step.capture = entry.get("capture") or {}
+            setup_steps.append(step)
+
+        async def send(client, entry, scheduled=None):
+            await self.send(client, recorded_step(entry), self.variables, scheduled)
+
+        connections = max_in_flight if speed else concurrency
+        async with self._client(connections) as client:
+            await self.run_setup(client, setup_steps)
+            self.measuring = True
+            start = time.perf_counter()
+            if speed:
+                first = traffic[0]["t"] if traffic else 0.0
+                arrivals = (((e["t"] - first) / speed, e) for e in traffic)
+                await self._open(client, arrivals, send, max_in_flight)
+            else:
+                pending = iter(traffic)
+
+                async def worker() -> None:
+                    for entry in pending:
+                        await send(client, entry)
+
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+            self.measuring = False
+            self.measured_seconds = time.perf_counter() - start
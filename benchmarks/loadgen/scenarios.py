@@ -0,0 +1,193 @@
+"""
+Scenario files and recorded traffic.
+
+A scenario is a JSON file:
+
+    {
+      "name": "users",
+      "setup": [<step>, ...],             # run once before the load starts
+      "flows": [
+        {"name": "list", "weight": 8, "steps": [<step>, ...]},
+        ...
+      ]
+    }
+
+and a step is one HTTP request:
+
+    {
+      "name": "list users",               # latency is reported per step name
+      "method": "GET",
+      "path": "/users/",
+      "params": {"limit": "50"},          # query string
+      "json": {...} | "form": {...},      # request body
+      "auth": true,                       # send "Authorization: Bearer {token}"
+      "expect": [200, 409],               # statuses that count as success
+      "capture": {"next": "next_cursor"}  # response JSON fields to keep
+    }
+
+Strings may contain `{var}` placeholders, filled from variables captured
+earlier in the flow (or by setup) and the built-ins `{run}` (per-run id),
+`{seq}` (per-flow counter) and `{uuid}` (fresh on every use). A step whose
+placeholders cannot be filled (e.g. a missing cursor) is skipped.
+
+Recorded traffic is JSON Lines, one sent request per line:
+
+    {"t": 0.0132, "name": "list users", "method": "GET", "path": "/users/",
+     "params": {"limit": "50"}, "json": null, "form": null, "auth": false,
+     "status": 200, "latency_ms": 3.1}
+
+`t` is seconds since the run started; replay resends the same requests at
+the same offsets (scaled by --speed) or as fast as the workers allow.
+"""
+
+import re
+import json
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class MissingVariable(KeyError):
+    pass
+
+
+@dataclass
+class Step:
+    name: str
+    method: str
+    path: str
+    params: dict = field(default_factory=dict)
+    json: Any = None
+    form: Optional[dict] = None
+    auth: bool = False
+    expect: Optional[list[int]] = None  # None: any 2xx/3xx
+    capture: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Step":
+        return cls(
+            name=data.get("name") or f"{data['method']} {data['path']}",
+            method=data["method"].upper(),
+            path=data["path"],
+            params=data.get("params", {}),
+            json=data.get("json"),
+            form=data.get("form"),
+            auth=data.get("auth", False),
+            expect=data.get("expect"),
+            capture=data.get("capture", {}),
+        )
+
+    def ok(self, status: int) -> bool:
+        if self.expect is None:
+            return 200 <= status < 400
+        return status in self.expect
+
+
+@dataclass
+class Flow:
+    name: str
+    weight: float
+    steps: list[Step]
+
+
+@dataclass
+class Scenario:
+    name: str
+    setup: list[Step]
+    flows: list[Flow]
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Scenario":
+        data = json.loads(Path(path).read_text())
+        flows = [
+            Flow(
+                name=flow["name"],
+                weight=float(flow.get("weight", 1)),
+                steps=[Step.from_dict(step) for step in flow["steps"]],
+            )
+            for flow in data["flows"]
+        ]
+        return cls(
+            name=data.get("name", Path(path).stem),
+            setup=[Step.from_dict(step) for step in data.get("setup", [])],
+            flows=flows,
+        )
+
+    @classmethod
+    def combine(cls, scenarios: list["Scenario"]) -> "Scenario":
+        """
+        One scenario running every flow of `scenarios`, weights kept.
+        """
+        if len(scenarios) == 1:
+            return scenarios[0]
+        return cls(
+            name="+".join(s.name for s in scenarios),
+            setup=[step for s in scenarios for step in s.setup],
+            flows=[flow for s in scenarios for flow in s.flows],
+        )
+
+
+def render(value: Any, variables: dict[str, Any]) -> Any:
+    """
+    Fill `{var}` placeholders in every string inside `value`.
+    """
+    if isinstance(value, str):
+
+        def replace(match: re.Match) -> str:
+            name = match.group(1)
+            if name == "uuid":
+                return uuid.uuid4().hex
+            if variables.get(name) is None:
+                raise MissingVariable(name)
+            return str(variables[name])
+
+        return _PLACEHOLDER.sub(replace, value)
+    if isinstance(value, dict):
+        return {k: render(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render(v, variables) for v in value]
+    return value
+
+
+def extract(body: Any, path: str) -> Any:
+    """
+    Dotted lookup into a JSON body: "job_ids.0", "items.-1.id".
+    """
+    for part in path.split("."):
+        if isinstance(body, list):
+            body = body[int(part)]
+        elif isinstance(body, dict):
+            body = body[part]
+        else:
+            raise KeyError(path)
+    return body
+
+
+# === Recording ===
+
+
+def read_recording(path: str | Path) -> Iterator[dict]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def recorded_step(entry: dict) -> Step:
+    """
+    Replay step for one recorded request; any status but 5xx is accepted,
+    since captured ids may no longer exist.
+    """
+    return Step(
+        name=entry.get("name") or f"{entry['method']} {entry['path']}",
+        method=entry["method"],
+        path=entry["path"],
+        params=entry.get("params") or {},
+        json=entry.get("json"),
+        form=entry.get("form"),
+        auth=entry.get("auth", False),
+        expect=list(range(200, 500)),
+    )
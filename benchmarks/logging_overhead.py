@@ -0,0 +1,112 @@
+"""
+Microbenchmark: hot-path cost of a log call.
+
+Compares the previous `logging.basicConfig` stream handler (format and
+write in the calling thread) with the queued pipeline from
+`app.utils.logging_utils`, where the caller only filters and enqueues.
+
+Each setup writes to two sinks: a temporary file (every write a real
+syscall) and a "slow pipe" whose writes block for --write-latency-us,
+like stderr behind a busy container log driver.
+
+Usage:
+    python -m benchmarks.logging_overhead [--calls 2000] [--rounds 5]
+
+Rounds stay below LOG_QUEUE_SIZE so no record is dropped; the fastest
+round is reported, plus the time the writer thread needed to drain the
+queued records afterwards.
+"""
+
+import time
+import logging
+import argparse
+import tempfile
+from app.utils.logging_utils import setup_logging, stop_logging
+
+bench_logger = logging.getLogger("bench.requests")
+
+
+class SlowStream:
+    """File wrapper whose writes block (without holding the GIL)."""
+
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data: str) -> int:
+        time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def log_calls(n: int, debug: bool = False) -> float:
+    """Mean µs per log call."""
+    log = bench_logger.debug if debug else bench_logger.info
+    start = time.perf_counter()
+    for i in range(n):
+        log("request %d handled in %.2f ms", i, 1.5)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run_sync(n: int, output) -> tuple[float, float]:
+    stop_logging()
+    logging.basicConfig(
+        force=True,
+        stream=output,
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    return log_calls(n), 0.0
+
+
+def run_queued(
+    n: int, output, fmt: str, sampling: dict, debug: bool = False
+) -> tuple[float, float]:
+    setup_logging("INFO", fmt, stream=output, sampling=sampling, rate_limits={})
+    per_call = log_calls(n, debug)
+    start = time.perf_counter()
+    stop_logging()  # waits for the writer thread to drain the queue
+    return per_call, (time.perf_counter() - start) * 1000
+
+
+def main(n: int, rounds: int, write_latency: float) -> None:
+    cases = {
+        "basicConfig stream (before)": lambda f: run_sync(n, f),
+        "queued, text": lambda f: run_queued(n, f, "text", {}),
+        "queued, JSON": lambda f: run_queued(n, f, "json", {}),
+        "queued, JSON, sampled out": lambda f: run_queued(
+            n, f, "json", {"bench": 0.0}
+        ),
+        "level disabled (debug)": lambda f: run_queued(n, f, "json", {}, debug=True),
+    }
+    with tempfile.TemporaryFile("w") as file:
+        sinks = {
+            "file": file,
+            f"slow pipe ({write_latency * 1e6:.0f} µs/write)": SlowStream(
+                file, write_latency
+            ),
+        }
+        for sink_name, output in sinks.items():
+            results = {name: (float("inf"), 0.0) for name in cases}
+            for _ in range(rounds):
+                for name, case in cases.items():
+                    per_call, drain_ms = case(output)
+                    if per_call < results[name][0]:
+                        results[name] = (per_call, drain_ms)
+            stop_logging()
+
+            print(f"{sink_name:<30} {'µs/call':>10} {'drain ms':>10}")
+            for name, (per_call, drain_ms) in results.items():
+                print(f"  {name:<28} {per_call:>10.2f} {drain_ms:>10.1f}")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--write-latency-us", type=float, default=100.0)
+    args = parser.parse_args()
+    main(args.calls, args.rounds, args.write_latency_us / 1e6)
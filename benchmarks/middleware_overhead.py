@@ -0,0 +1,126 @@
+"""
+Microbenchmark: per-request overhead of the HTTP middleware stack.
+
+Compares the previous BaseHTTPMiddleware / @app.middleware("http") versions
+against the pure ASGI ones by driving each ASGI app directly (no sockets).
+The Redis call is replaced with a constant result so only the middleware
+wrapping cost is measured.
+
+Usage:
+    python -m benchmarks.middleware_overhead [--requests 20000]
+"""
+
+import os
+import time
+import asyncio
+import argparse
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.utils import rate_limiter
+from app.utils.profile_middleware import RequestProfilerMiddleware
+from app.utils.rate_limiter import RateLimitMiddleware, RateLimitResult
+
+
+async def endpoint(request):
+    return PlainTextResponse("ok")
+
+
+async def fake_check(identity: str, scope: str, limit: int) -> RateLimitResult:
+    return RateLimitResult(True, limit, limit - 1, 60_000)
+
+
+# === Previous implementations (for comparison only) ===
+
+
+class LegacyProfilerMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if os.getenv("PROFILE", "0") != "1":
+            return await call_next(request)
+        return await call_next(request)
+
+
+async def legacy_rate_limiter(request, call_next):
+    result = await fake_check(request.client.host, "default", 100)
+    response = await call_next(request)
+    response.headers.update(result.headers())
+    return response
+
+
+def build_apps() -> dict:
+    routes = [Route("/", endpoint)]
+    return {
+        "no middleware": Starlette(routes=routes),
+        "BaseHTTPMiddleware (before)": Starlette(
+            routes=routes,
+            middleware=[
+                Middleware(LegacyProfilerMiddleware),
+                Middleware(BaseHTTPMiddleware, dispatch=legacy_rate_limiter),
+            ],
+        ),
+        "pure ASGI (after)": Starlette(
+            routes=routes,
+            middleware=[
+                Middleware(RequestProfilerMiddleware, enabled=False),
+                Middleware(RateLimitMiddleware),
+            ],
+        ),
+    }
+
+
+async def drive(app, n: int) -> float:
+    """Send `n` GET / requests through `app`; return mean µs per request."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def send(message):
+        pass
+
+    async def one():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            return messages.pop() if messages else {"type": "http.disconnect"}
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(min(n, 500)):
+        await one()
+    start = time.perf_counter()
+    for _ in range(n):
+        await one()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def main(n: int) -> None:
+    rate_limiter.check_rate_limit = fake_check
+    results = {}
+    for name, app in build_apps().items():
+        async with app.router.lifespan_context(app):
+            results[name] = await drive(app, n)
+
+    baseline = results["no middleware"]
+    print(f"{'stack':<30} {'µs/request':>12} {'overhead':>12}")
+    for name, us in results.items():
+        print(f"{name:<30} {us:>12.1f} {us - baseline:>+12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,98 @@
+"""
+Microbenchmark: cost of per-request stage timing.
+
+Measures a bare `span` enter/exit (inside and outside a request), then the
+per-request overhead of RequestTimingMiddleware + TimedRoute on a FastAPI
+app with a response model, driven directly over ASGI (no sockets).
+
+Usage:
+    python -m benchmarks.request_timing_overhead [--requests 5000] [--rounds 5]
+
+Stacks are measured in interleaved rounds and the fastest round is kept,
+so a noisy neighbour cannot skew one stack more than another.
+"""
+
+import time
+import asyncio
+import argparse
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from app.utils import request_timing
+from app.utils.request_timing import (
+    RequestTimingMiddleware,
+    RequestTimings,
+    TimedRoute,
+    span,
+)
+from benchmarks.middleware_overhead import drive
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+def build_app(route_class: type[APIRoute], timing: bool, header: bool) -> FastAPI:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/", response_model=Item)
+    async def endpoint():
+        with span("work"):
+            return {"id": 1, "name": "bench"}
+
+    app = FastAPI()
+    app.include_router(router)
+    if timing:
+        app.add_middleware(RequestTimingMiddleware, enabled=True, header=header)
+    return app
+
+
+def time_spans(n: int) -> tuple[float, float]:
+    """Mean ns per `with span(...)` outside and inside a request."""
+
+    def run() -> float:
+        start = time.perf_counter()
+        for _ in range(n):
+            with span("bench"):
+                pass
+        return (time.perf_counter() - start) / n * 1e9
+
+    outside = run()
+    token = request_timing._timings.set(RequestTimings())
+    try:
+        inside = run()
+    finally:
+        request_timing._timings.reset(token)
+    return outside, inside
+
+
+async def main(n: int, rounds: int) -> None:
+    outside, inside = time_spans(n * 10)
+    print(f"{'span':<34} {'ns/op':>12}")
+    print(f"{'outside a request':<34} {outside:>12.0f}")
+    print(f"{'inside a request':<34} {inside:>12.0f}")
+    print()
+
+    apps = {
+        "APIRoute, no timing": build_app(APIRoute, False, False),
+        "TimedRoute, middleware off": build_app(TimedRoute, False, False),
+        "TimedRoute + middleware": build_app(TimedRoute, True, False),
+        "TimedRoute + Server-Timing": build_app(TimedRoute, True, True),
+    }
+    results = {name: float("inf") for name in apps}
+    for _ in range(rounds):
+        for name, app in apps.items():
+            results[name] = min(results[name], await drive(app, n))
+    baseline = results["APIRoute, no timing"]
+    print(f"{'stack':<34} {'µs/request':>12} {'overhead':>12}")
+    for name, us in results.items():
+        print(f"{name:<34} {us:>12.1f} {us - baseline:>+12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
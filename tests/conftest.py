@@ -0,0 +1,74 @@
+"""
+Shared fixtures: a throwaway SQLite database and an in-memory Redis
+(fakeredis) stand in for Postgres and Redis.
+"""
+
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite+aiosqlite:///{_tmp}/primary.db",
+    REDIS_URL="redis://localhost:6379/0",
+    RATE_LIMIT_ENABLED="false",
+    PASSWORD_HASH_WORKERS="0",
+    LOG_FORMAT="text",
+    LOG_LEVEL="WARNING",
+)
+
+import fakeredis
+import httpx
+import pytest
+import redis
+from app.utils.request_timing import TimedRedis
+
+FAKE_SERVER = fakeredis.FakeServer()
+# Every client the app creates talks to the same in-memory server
+redis.Redis.from_url = classmethod(
+    lambda cls, url, **kw: fakeredis.FakeRedis(server=FAKE_SERVER, **kw)
+)
+TimedRedis.from_url = classmethod(
+    lambda cls, url, **kw: cls(
+        connection_pool=fakeredis.FakeAsyncRedis(
+            server=FAKE_SERVER, **kw
+        ).connection_pool
+    )
+)
+
+from app.auth import dependencies as auth_dependencies  # noqa: E402
+from app.core.database import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.users import service as user_service  # noqa: E402
+
+
+@pytest.fixture
+def sync_redis():
+    return fakeredis.FakeRedis(server=FAKE_SERVER)
+
+
+@pytest.fixture
+def async_redis():
+    return fakeredis.FakeAsyncRedis(server=FAKE_SERVER)
+
+
+@pytest.fixture(autouse=True)
+async def clean_state():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    fakeredis.FakeRedis(server=FAKE_SERVER).flushall()
+    user_service.local_cache.clear()
+    auth_dependencies._token_cache.clear()
+    auth_dependencies._user_cache.clear()
+
+
+@pytest.fixture
+async def client():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as http:
+            yield http
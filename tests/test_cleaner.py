@@ -0,0 +1,79 @@
+import time
+import pytest
+from rq import Queue, Retry
+from rq.job import Job
+from rq.registry import (
+    DeferredJobRegistry,
+    FailedJobRegistry,
+    FinishedJobRegistry,
+    StartedJobRegistry,
+)
+from app.queue.cleaner import RegistryRule, clean_registries, default_rules
+
+
+@pytest.fixture
+def queue(sync_redis):
+    return Queue("default", connection=sync_redis)
+
+
+def enqueue(queue, **kwargs) -> Job:
+    return queue.enqueue("app.tasks.process_image", "x.png", **kwargs)
+
+
+async def test_expired_finished_jobs_are_deleted(queue, sync_redis, async_redis):
+    registry = FinishedJobRegistry("default", connection=sync_redis)
+    old, fresh = enqueue(queue), enqueue(queue)
+    now = time.time()
+    sync_redis.zadd(registry.key, {old.id: now - 10, fresh.id: now + 60})
+
+    cleaned = await clean_registries(async_redis, started_grace=None)
+
+    assert cleaned["finished"] == 1
+    assert registry.get_job_ids() == [fresh.id]
+    assert not sync_redis.exists(old.key)
+    assert sync_redis.exists(fresh.key)
+
+
+async def test_cap_deletes_oldest_entries_in_chunks(queue, sync_redis, async_redis):
+    registry = FailedJobRegistry("default", connection=sync_redis)
+    jobs = [enqueue(queue) for _ in range(5)]
+    now = time.time()
+    sync_redis.zadd(registry.key, {job.id: now + 60 + i for i, job in enumerate(jobs)})
+    rules = [RegistryRule("failed", FailedJobRegistry.key_template, 0, 2)]
+
+    cleaned = await clean_registries(
+        async_redis, rules, chunk_size=2, started_grace=None
+    )
+
+    assert cleaned["failed"] == 3
+    assert registry.get_job_ids() == [jobs[3].id, jobs[4].id]
+
+
+async def test_deferred_jobs_are_kept(queue, sync_redis, async_redis):
+    parent = enqueue(queue)
+    child = enqueue(queue, depends_on=parent)
+    assert child.get_status() == "deferred"
+
+    await clean_registries(async_redis)
+
+    assert sync_redis.exists(child.key)
+    assert child.id in DeferredJobRegistry("default", connection=sync_redis)
+    assert [rule.name for rule in default_rules()] == ["finished", "failed"]
+
+
+async def test_abandoned_started_jobs_fail_or_retry(queue, sync_redis, async_redis):
+    registry = StartedJobRegistry("default", connection=sync_redis)
+    plain, running = enqueue(queue), enqueue(queue)
+    retried = enqueue(queue, retry=Retry(max=2))
+    late, alive = time.time() - 7200, time.time() + 60
+    sync_redis.zadd(
+        registry.key, {plain.id: late, retried.id: late, running.id: alive}
+    )
+
+    cleaned = await clean_registries(async_redis, started_grace=3600)
+
+    assert cleaned["started"] == 2
+    assert registry.get_job_ids() == [running.id]
+    assert plain.get_status(refresh=True) == "failed"
+    assert plain.id in FailedJobRegistry("default", connection=sync_redis)
+    assert retried.get_status(refresh=True) == "queued"
@@ -0,0 +1,49 @@
+import time
+from prometheus_client import REGISTRY
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.database import InstrumentedPool, watch_pool
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_checkout_wait_excludes_connect_time(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedPool,
+        pool_size=1,
+    )
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def slow_connect(*args):
+        time.sleep(0.2)
+
+    wait_before = sample("db_pool_checkout_wait_seconds_sum")
+    connect_before = sample("db_pool_connect_seconds_sum")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+
+    assert sample("db_pool_connect_seconds_sum") - connect_before >= 0.2
+    assert sample("db_pool_checkout_wait_seconds_sum") - wait_before < 0.1
+
+
+async def test_pool_gauges_are_labelled_by_engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedPool,
+        pool_size=3,
+    )
+    watch_pool("replica7", engine.pool)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert sample("db_pool_checked_out", engine="replica7") == 1
+        assert sample("db_pool_size", engine="replica7") == 3
+        assert sample("db_pool_checked_out", engine="replica7") == 0
+    finally:
+        await engine.dispose()
@@ -0,0 +1,93 @@
+import asyncio
+import httpx
+import pytest
+from benchmarks.loadgen.histogram import LatencyHistogram
+from benchmarks.loadgen.report import build_report, compare
+from benchmarks.loadgen.runner import LoadRunner
+from benchmarks.loadgen.scenarios import Flow, Scenario, Step
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = LatencyHistogram()
+    for value in range(1, 100_001):
+        histogram.record(value)
+
+    for percentile, exact in ((50, 50_000), (99, 99_000), (99.9, 99_900)):
+        value = histogram.value_at(percentile)
+        assert exact <= value <= exact * 1.001
+    assert histogram.value_at(100) == 100_000
+    assert LatencyHistogram().value_at(99) == 0
+
+
+def test_histogram_merge_matches_single_histogram():
+    single, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 5_001):
+        single.record(value * 7)
+        (left if value % 2 else right).record(value * 7)
+
+    left.merge(right)
+    assert left.summary_ms() == single.summary_ms()
+    assert set(single.summary_ms()) == {
+        "min", "mean", "p50", "p90", "p95", "p99", "p999", "max"
+    }
+
+
+def _report(p999=10.0, error_rate=0.0, rps=100.0, mode="closed"):
+    step = {
+        "error_rate": error_rate,
+        "throughput_rps": rps,
+        "latency_ms": {"p50": 1.0, "p95": 2.0, "p99": 5.0, "p999": p999},
+    }
+    return {"meta": {"mode": mode}, "overall": step, "steps": {"login": step}}
+
+
+def test_compare_flags_p999_regression():
+    regressions = compare(_report(p999=20.0), _report())
+    assert regressions == [
+        "overall: p999 10.00 -> 20.00 ms (+100%)",
+        "login: p999 10.00 -> 20.00 ms (+100%)",
+    ]
+    # Below `min_delta_ms` a relative increase is noise
+    assert compare(_report(p999=10.5), _report(), min_delta_ms=1.0) == []
+
+
+def test_compare_error_rate_and_throughput():
+    assert compare(_report(), _report()) == []
+    errors = compare(_report(error_rate=0.05), _report())
+    assert errors[0] == "overall: error rate 0.00% -> 5.00%"
+    slower = compare(_report(rps=50.0), _report())
+    assert slower[0] == "overall: throughput 100.0 -> 50.0 req/s"
+    # Open-loop throughput is the offered rate, not a result
+    assert compare(_report(rps=50.0, mode="open"), _report(mode="open")) == []
+
+
+@pytest.mark.parametrize("shape", ["closed", "open"])
+async def test_throughput_counts_flows_finishing_after_window(monkeypatch, shape):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.3)
+        return httpx.Response(200)
+
+    scenario = Scenario(
+        name="slow",
+        setup=[],
+        flows=[Flow("ping", 1, [Step(name="ping", method="GET", path="/")])],
+    )
+    runner = LoadRunner("http://test", scenario)
+    monkeypatch.setattr(
+        runner,
+        "_client",
+        lambda connections: httpx.AsyncClient(
+            base_url="http://test", transport=httpx.MockTransport(handler)
+        ),
+    )
+    if shape == "closed":
+        await runner.closed_loop(concurrency=2, duration=0.1)
+    else:
+        await runner.open_loop(rate=20, duration=0.1)
+
+    report = build_report(runner, {"mode": shape})
+    assert report["overall"]["count"] == 2
+    # Both requests took 0.3 s, so the measured time must cover them
+    assert runner.measured_seconds >= 0.3
+    assert report["overall"]["throughput_rps"] <= 2 / 0.3
+    assert not runner.measuring
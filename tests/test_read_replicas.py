@@ -0,0 +1,101 @@
+"""
+Replica routing against two SQLite files: the suite's primary database and
+separate replica files that start out empty.
+"""
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import database
+from app.core.config import settings
+from app.core.database import Base, READ_PRIMARY_COOKIE
+
+
+async def make_replica(path):
+    # A queue pool, so least_connections has checkouts to compare
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+@pytest.fixture
+async def replicas(tmp_path, monkeypatch):
+    engines = [await make_replica(tmp_path / f"replica{i}.db") for i in range(2)]
+    factories = [async_sessionmaker(e, expire_on_commit=False) for e in engines]
+    monkeypatch.setattr(database, "replica_engines", engines)
+    monkeypatch.setattr(database, "_replica_session_factories", factories)
+    monkeypatch.setattr(database, "_replica_healthy", [True, True])
+    yield factories
+    for engine in engines:
+        await engine.dispose()
+
+
+async def test_round_robin_over_healthy_replicas(replicas, monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_BALANCING", "round_robin")
+
+    picked = [database.read_session_factory() for _ in range(4)]
+
+    assert set(picked) == set(replicas)
+    assert picked[0] is not picked[1]
+
+
+async def test_least_connections_prefers_idle_replica(replicas, monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_BALANCING", "least_connections")
+
+    async with database.replica_engines[0].connect():
+        assert database.read_session_factory() is replicas[1]
+
+
+async def test_least_connections_without_pool_tracking(
+    replicas, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(settings, "DB_REPLICA_BALANCING", "least_connections")
+    plain = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/plain.db")
+    assert not hasattr(plain.pool, "checkedout")  # SQLite's default NullPool
+    database.replica_engines[0] = plain
+    try:
+        assert database.read_session_factory() in replicas
+    finally:
+        await plain.dispose()
+
+
+async def test_failed_health_check_falls_back_to_primary(replicas, tmp_path):
+    # A database file inside a missing directory cannot be opened
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/x.db")
+    database.replica_engines[1] = broken
+    try:
+        await database._check_replicas()
+
+        assert database._replica_healthy == [True, False]
+        assert REGISTRY.get_sample_value("db_replica_healthy", {"replica": "1"}) == 0
+        assert {database.read_session_factory() for _ in range(3)} == {replicas[0]}
+
+        database._replica_healthy[0] = False
+        assert database.read_session_factory() is database.async_session_factory
+    finally:
+        await broken.dispose()
+
+
+async def test_writer_reads_its_own_writes_from_primary(replicas, client):
+    # Reads go to the (empty) replicas until the client writes
+    assert (await client.get("/users/")).json()["items"] == []
+
+    response = await client.post("/users/", json={"name": "hana"})
+    assert READ_PRIMARY_COOKIE in response.cookies
+
+    users = (await client.get("/users/?limit=10")).json()["items"]
+    assert [u["name"] for u in users] == ["hana"]
+
+    client.cookies.clear()
+    assert (await client.get("/users/?limit=20")).json()["items"] == []
+
+
+async def test_invalid_cookie_is_ignored(replicas, client):
+    await client.post("/users/", json={"name": "ivan"})
+    client.cookies.set(READ_PRIMARY_COOKIE, "not-a-time")
+
+    assert (await client.get("/users/?limit=30")).json()["items"] == []
@@ -0,0 +1,57 @@
+import asyncio
+import json
+from app.core.database import async_session_factory
+from app.repositories.user_repository import UserRepository
+from app.utils.read_through_cache import ReadThroughCache
+
+
+async def test_concurrent_misses_share_one_load(async_redis):
+    cache = ReadThroughCache(async_redis, "test")
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+
+    assert results == [{"id": 1}] * 5
+    assert calls == 1
+
+
+async def test_cancelling_first_caller_does_not_fail_the_others(async_redis):
+    cache = ReadThroughCache(async_redis, "test")
+
+    async def loader():
+        await asyncio.sleep(0.1)
+        return {"id": 1}
+
+    first = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == {"id": 1}
+    assert first.cancelled()
+
+
+async def test_repository_loads_outside_the_callers_session(async_redis, monkeypatch):
+    async with async_session_factory() as db:
+        await UserRepository(db).create_user("erin", hashed_password="secret-hash")
+
+    async with async_session_factory() as db:
+
+        async def forbidden(*args, **kwargs):
+            raise AssertionError("shared load used the caller's session")
+
+        monkeypatch.setattr(db, "execute", forbidden)
+        monkeypatch.setattr(db, "get", forbidden)
+        repo = UserRepository(db, cache=ReadThroughCache(async_redis, "users:entity"))
+        user = await repo.get_by_name("erin")
+
+    assert user.name == "erin"
+    entry = json.loads(await async_redis.get("users:entity:name:erin"))
+    assert entry["v"] == {"id": user.id, "name": "erin", "email": None}
@@ -0,0 +1,25 @@
+from app.core.database import async_session_factory
+from app.repositories.user_repository import UserRepository
+from app.utils.read_through_cache import ReadThroughCache
+
+
+async def test_rename_invalidates_old_and_new_cache_keys(async_redis):
+    async with async_session_factory() as db:
+        repo = UserRepository(db, cache=ReadThroughCache(async_redis, "users:entity"))
+        user = await repo.create_user("frank")
+        # Warm the cache, including a negative entry for the new name
+        assert (await repo.get_by_name("frank")).id == user.id
+        assert await repo.get_by_name("francis") is None
+
+        renamed = await repo.update_returning(user.id, name="francis")
+
+        assert renamed.name == "francis"
+        assert await async_redis.keys("users:entity:*") == []
+        assert await repo.get_by_name("frank") is None
+        assert (await repo.get_by_name("francis")).id == user.id
+
+
+async def test_update_of_missing_row_returns_none(async_redis):
+    async with async_session_factory() as db:
+        repo = UserRepository(db, cache=ReadThroughCache(async_redis, "users:entity"))
+        assert await repo.update_returning(12345, name="nobody") is None
@@ -0,0 +1,53 @@
+import json
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def ndjson(*rows) -> bytes:
+    return b"".join(
+        (row if isinstance(row, bytes) else json.dumps(row).encode()) + b"\n"
+        for row in rows
+    )
+
+
+async def test_bulk_import_reports_invalid_rows_per_line(client):
+    body = ndjson(
+        {"name": "alice", "email": "alice@example.com"},
+        {"name": 123},
+        b"{not json",
+        {"email": "nobody@example.com"},
+        {"name": "bob"},
+    )
+    response = await client.post("/users/bulk", content=body, headers=NDJSON)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["conflicts"] == []
+    assert [issue["line"] for issue in result["invalid"]] == [2, 3, 4]
+    assert all(issue["name"] is None for issue in result["invalid"])
+
+
+async def test_bulk_import_reports_conflicts(client):
+    await client.post("/users/", json={"name": "alice"})
+    body = ndjson({"name": "alice"}, {"name": "carol"}, {"name": "carol"})
+    response = await client.post("/users/bulk", content=body, headers=NDJSON)
+
+    result = response.json()
+    assert result["created"] == 1
+    assert [(c["line"], c["name"]) for c in result["conflicts"]] == [
+        (1, "alice"),
+        (3, "carol"),
+    ]
+
+
+async def test_bulk_import_accepts_json_array(client):
+    response = await client.post(
+        "/users/bulk", json=[{"name": "dave"}, {"name": ["not", "a", "name"]}]
+    )
+
+    result = response.json()
+    assert result["created"] == 1
+    assert result["invalid"][0]["line"] == 2
+    users = (await client.get("/users/")).json()["items"]
+    assert [u["name"] for u in users] == ["dave"]
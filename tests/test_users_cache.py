@@ -0,0 +1,41 @@
+import pytest
+from app.core.database import async_session_factory
+from app.users import service as user_service
+from app.users.service import UserService
+
+
+class InvalidatedDuringGet:
+    """Redis proxy whose GET races with an invalidation from another request."""
+
+    def __init__(self, redis):
+        self._redis = redis
+
+    async def get(self, key):
+        value = await self._redis.get(key)
+        user_service.local_cache.clear()
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self._redis, name)
+
+
+@pytest.mark.parametrize("warm_redis", [False, True])
+async def test_invalidation_during_fetch_is_not_undone(async_redis, warm_redis):
+    async with async_session_factory() as db:
+        if warm_redis:
+            await UserService(db, async_redis).list_users(limit=5)
+            user_service.local_cache.clear()
+
+        racy = UserService(db, InvalidatedDuringGet(async_redis))
+        await racy.list_users(limit=5)
+
+    key = UserService._page_cache_key(5, None, None, None)
+    assert user_service.local_cache.get(key) is None
+
+
+async def test_page_is_kept_in_l1_without_invalidation(async_redis):
+    async with async_session_factory() as db:
+        await UserService(db, async_redis).list_users(limit=5)
+
+    key = UserService._page_cache_key(5, None, None, None)
+    assert user_service.local_cache.get(key) is not None